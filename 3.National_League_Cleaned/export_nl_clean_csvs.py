@@ -2,20 +2,47 @@
 """
 export_nl_clean_csvs.py
 -----------------------
-Create tidy views in national_league.db and dump them as five
+Create tidy views in the pipeline DB and dump them as five
 combined CSV files (one per logical table) in National_League_final_data/.
 The output mirrors your peer’s American-League files.
+
+Export engine
+• each view is streamed from a cursor in --batch-size chunks (flat memory)
+• the views are written concurrently, each on its own read-only connection
+• --format csv | csv.gz | csv.zst | parquet   (zstd needs `zstandard`,
+  parquet needs `pyarrow`)
+• a view is skipped when the DB build id and the versions of its source
+  tables (table_versions, both stamped by create_nl_db.py) match the last
+  export — use --force to rewrite
+
+DB and output folder come from nl_pipeline.json; ``--view`` exports a
+subset so run_pipeline.py can run the five exports side by side.
 """
 
-import sqlite3, pandas as pd, logging
+import argparse, csv, gzip, hashlib, importlib.util, io, json, logging, sqlite3, sys, time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # shared nl_* modules
+import nl_config, nl_db, nl_metrics
+
+# Optional compressors / columnar writer
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None   # imported on use
+
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s  %(levelname)s  %(message)s")
 
-DB_PATH    = "national_league.db"
-OUT_DIR    = Path("National_League_final_data")
-OUT_DIR.mkdir(exist_ok=True)
+DB_PATH    = nl_config.path("db_path")
+OUT_DIR    = nl_config.path("export_dir")
+OUT_DIR.mkdir(parents=True, exist_ok=True)
+STATE_DIR  = OUT_DIR / ".export_state"     # one stamp file per view + format
+BATCH_SIZE = 10_000
+
+FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "csv.zst": ".csv.zst", "parquet": ".parquet"}
 
 VIEWS = {
     # 1 ───────────────────────────────────────────────────────────────
@@ -77,26 +104,165 @@ NAME_MAP = {
     "nl_team_pitching":   "5_National_League_Team_Review_Pitching_Statistics_Leaderboard.csv",
 }
 
-conn = sqlite3.connect(DB_PATH)
+# Source tables behind each view (drives the skip-if-unchanged check)
+VIEW_TABLES = {
+    "nl_player_hitting":  ["player_hitting_leaders"],
+    "nl_player_pitching": ["player_pitching_leaders"],
+    "nl_team_standings":  ["team_standings"],
+    "nl_team_hitting":    ["team_hitting_leaders"],
+    "nl_team_pitching":   ["team_pitching_leaders"],
+}
+
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64"}   # everything else → string
+
+
+def out_path(view, fmt):
+    return OUT_DIR / (Path(NAME_MAP[view]).stem + FORMATS[fmt])
+
+
+def _open_text(path, fmt):
+    """Text handle for the CSV formats; compression happens on the fly."""
+    if fmt == "csv.gz":
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    if fmt == "csv.zst":
+        if zstandard is None:
+            raise RuntimeError("csv.zst needs the `zstandard` package (pip install zstandard)")
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw),
+                                newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def _columns(conn, view):
+    """
+    {column: declared type} of the view.  'Top 25' is left out when it is
+    all-null — checked up front with one probe instead of after the fact.
+    """
+    types = {r[1]: (r[2] or "").upper() for r in conn.execute(f"PRAGMA table_info({view})")}
+    if "Top 25" in types and conn.execute(
+            f'SELECT 1 FROM {view} WHERE "Top 25" IS NOT NULL LIMIT 1').fetchone() is None:
+        del types["Top 25"]
+    return types
+
+
+def export_view(view, fmt, batch_size):
+    """Stream one view to disk on a private read-only connection."""
+    t0 = time.perf_counter()
+    conn = nl_db.connect_ro(DB_PATH)
+    try:
+        types = _columns(conn, view)
+        cols  = list(types)
+        cur = conn.execute("SELECT " + ", ".join(f'"{c}"' for c in cols) + f" FROM {view}")
+
+        path = out_path(view, fmt)
+        tmp  = path.with_name(path.name + ".tmp")
+        rows = 0
+        if fmt == "parquet":
+            import pyarrow as pa, pyarrow.parquet as pq
+            schema = pa.schema([(c, ARROW_TYPES.get(t, "string")) for c, t in types.items()])
+            with pq.ParquetWriter(tmp, schema) as writer:
+                while batch := cur.fetchmany(batch_size):
+                    columns = list(zip(*batch))
+                    arrays = [pa.array([None if v is None else str(v) for v in col]
+                                       if f.type == pa.string() else col, type=f.type)
+                              for col, f in zip(columns, schema)]
+                    writer.write_batch(pa.record_batch(arrays, schema=schema))
+                    rows += len(batch)
+        else:
+            with _open_text(tmp, fmt) as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(cols)
+                while batch := cur.fetchmany(batch_size):
+                    writer.writerows(batch)
+                    rows += len(batch)
+        tmp.replace(path)
+    finally:
+        conn.close()
+    return view, path, rows, time.perf_counter() - t0
+
+
+def _load_stamp(view, fmt):
+    try:
+        return json.loads((STATE_DIR / f"{view}.{fmt}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_stamp(view, fmt, stamp):
+    STATE_DIR.mkdir(exist_ok=True)
+    (STATE_DIR / f"{view}.{fmt}.json").write_text(json.dumps(stamp), encoding="utf-8")
+
+
+def _stamp(conn, view):
+    """What an export of *view* depends on; equal stamps mean nothing changed."""
+    build = nl_db.build_id(conn)            # versions restart at 1 on a rebuild
+    versions = nl_db.table_versions(conn, VIEW_TABLES[view])
+    if build is None or len(versions) < len(VIEW_TABLES[view]):
+        return None                         # untracked DB / table: always export
+    return {"sql": hashlib.sha256(VIEWS[view].encode()).hexdigest()[:16],
+            "build": build, "versions": versions}
+
+
+parser = argparse.ArgumentParser(description="Export NL views to CSV")
+parser.add_argument("--view", choices=list(VIEWS), action="append",
+                    help="Only export this view (repeatable; default all five)")
+parser.add_argument("--format", choices=list(FORMATS), default="csv",
+                    help="Output format (default csv)")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                    help=f"Rows fetched per cursor batch (default {BATCH_SIZE})")
+parser.add_argument("--jobs", type=int, default=len(VIEWS),
+                    help="Views exported in parallel (default all at once)")
+parser.add_argument("--force", action="store_true",
+                    help="Export even if the source tables are unchanged")
+nl_metrics.add_arguments(parser)
+args = nl_metrics.configure(parser.parse_args())
+selected = args.view or list(VIEWS)
+if args.format == "csv.zst" and zstandard is None:
+    sys.exit("❌ --format csv.zst needs the `zstandard` package (pip install zstandard)")
+if args.format == "parquet" and not HAVE_PYARROW:
+    sys.exit("❌ --format parquet needs the `pyarrow` package (pip install pyarrow)")
+
+conn = sqlite3.connect(DB_PATH, timeout=30)   # parallel exports share the DB
 cur  = conn.cursor()
 
-# ── 1. Create/replace the SQL views ─────────────────────────────────
-for view, sql in VIEWS.items():
-    cur.execute(f"DROP VIEW IF EXISTS {view};")
-    cur.execute(f"CREATE VIEW {view} AS {sql};")
-    logging.info("Created view %s", view)
+stage_name = "export_" + "_".join(args.view) if args.view else "export"
+with nl_metrics.stage(stage_name) as m:
+    # ── 1. Create/replace the SQL views (only when the SQL changed) ─────
+    for view in selected:
+        sql = f"CREATE VIEW {view} AS {VIEWS[view]}"
+        row = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ?",
+                          (view,)).fetchone()
+        if row and row[0] == sql:
+            continue
+        with conn:
+            cur.execute(f"DROP VIEW IF EXISTS {view};")
+            cur.execute(sql)
+        logging.info("Created view %s", view)
 
-# ── 2. Export each view to a single CSV ─────────────────────────────
-for view, csv_name in NAME_MAP.items():
-    df = pd.read_sql_query(f"SELECT * FROM {view};", conn)
+    # ── 2. Work out which views actually need exporting ─────────────────
+    stamps = {view: _stamp(conn, view) for view in selected}
+    conn.close()
+    todo = []
+    for view in selected:
+        fresh = stamps[view] is not None and _load_stamp(view, args.format) == stamps[view] \
+            and out_path(view, args.format).exists()
+        if fresh and not args.force:
+            logging.info("✓ %s unchanged — skipped", view)
+        else:
+            todo.append(view)
 
-    # Optional: drop 'Top 25' if it’s all-null
-    if "Top 25" in df.columns and df["Top 25"].isna().all():
-        df = df.drop(columns=["Top 25"])
+    # ── 3. Stream the views to disk, all at once ────────────────────────
+    with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(todo) or 1))) as pool:
+        futures = [pool.submit(export_view, v, args.format, args.batch_size) for v in todo]
+        for fut in futures:
+            view, path, rows, secs = fut.result()
+            m.files[path.name] = round(secs, 4)
+            m.read(rows=rows, nbytes=0)
+            m.wrote(path, rows=rows)
+            if stamps[view] is not None:
+                _save_stamp(view, args.format, stamps[view])
+            logging.info("Wrote %s  (%d rows, %.2fs)", path, rows, secs)
 
-    out_path = OUT_DIR / csv_name
-    df.to_csv(out_path, index=False)
-    logging.info("Wrote %s  (%d rows)", out_path, len(df))
+    m.extra = {"exported": len(todo), "skipped": len(selected) - len(todo)}
 
-conn.close()
 logging.info("🏁 Export complete — files are in %s", OUT_DIR)
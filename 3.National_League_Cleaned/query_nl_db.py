@@ -2,15 +2,34 @@
 """
 query_nl_db.py
 --------------
-Lightweight command-line client for `national_league.db`.
+Lightweight command-line client for the pipeline DB
+(`db_path` in nl_pipeline.json).
 
 Features
 • Built-in queries:
   • top_players   player stat leaderboard  (JOINs team standings)
   • player_team   season-by-season line for one player incl. team W-L
+                  (read from the precomputed player_seasons timeline, or
+                  from the leader tables on a DB without it)
+  • career        one player's career summary + titles / peak per statistic
+  • career_leaders most seasons leading a statistic (or any statistic)
+  • records       single-season record progression for one statistic
+                  (who set it, whose record it broke, how long it stood),
+                  or every statistic's current record
+  • streaks       longest runs of consecutive seasons leading a statistic,
+                  by player or by club (--kind team)
+  • repeat_leaders most seasons leading a statistic, by player or club
+                  (records / streaks / repeat_leaders read the nl_records tables)
+  • similar       nearest player / team seasons to one season
+                  (precomputed nl_similar vectors, Euclidean distance)
   • team_summary  year + basic record for one club
+  • era_leaders   cross-era leaderboard on the era-normalized values
+                  (era_stats: per-season / ±10-season z-score, percentile,
+                  ratio to mean — higher is always better)
 • Custom SQL mode:  python query_nl_db.py sql "SELECT …"
 • Flags for --year, --stat, --player, --team, --limit
+• --engine numpy answers the built-in queries from the in-memory
+  nl_store.StatsStore instead of SQL (same columns, no SQL per query)
 • Graceful error handling + pretty tables
 """
 
@@ -18,7 +37,14 @@ import argparse, sqlite3, sys
 import pandas as pd
 from pathlib import Path
 
-DB_PATH = Path("national_league.db")   # adjust if you moved the file
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # shared nl_* modules
+import nl_config, nl_similar, nl_store
+from nl_careers import PLAYER_SOURCES
+
+DB_PATH = nl_config.path("db_path")   # set in nl_pipeline.json
+
+# Built-in queries the numpy engine can answer
+NUMPY_COMMANDS = {"top_players", "player_team", "team_summary"}
 
 # Check if tabulate is installed for pretty printing
 try:
@@ -41,16 +67,17 @@ SQL_TOP_PLAYERS = """
 SELECT  p.Year,
         p.Name,
         p.Team,
-        p."{stat}"       AS StatValue,
+        CAST(REPLACE(p."#", ',', '') AS REAL) AS Value,
         t.Wins,
         t.Losses
-FROM    player_hitting_leaders AS p
+FROM    {table} AS p
 LEFT JOIN team_standings  AS t
           ON p.Year = t.Year
          AND p.Team = t.Team
-WHERE   p."{stat}" IS NOT NULL
+WHERE   p.Statistic = :stat
+        AND p."#" IS NOT NULL
         {year_clause}
-ORDER BY StatValue DESC
+ORDER BY Value {order}, p.Year
 LIMIT   :limit;
 """
 
@@ -60,15 +87,62 @@ SELECT  p.Year,
         t.Wins,
         t.Losses,
         p.Statistic,
-        p."#"           AS Value
-FROM    player_hitting_leaders p
+        p.Value
+FROM    player_careers c
+JOIN    player_seasons p USING (player_id)
 LEFT JOIN team_standings t
           ON p.Year = t.Year
          AND p.Team = t.Team
-WHERE   p.Name = :player
+WHERE   c.Name = :player
+        {source_clause}
 ORDER BY p.Year;
 """
 
+# player_team on a DB built before the career tables: read the leader tables
+SQL_PLAYER_TEAM_LEADERS = """
+SELECT  p.Year,
+        p.Team,
+        t.Wins,
+        t.Losses,
+        p.Statistic,
+        p."#" AS Value
+FROM    {table} p
+LEFT JOIN team_standings t
+          ON p.Year = t.Year
+         AND p.Team = t.Team
+WHERE   p.Name = :player
+"""
+
+SQL_CAREER = """
+SELECT  player_id, Name, First, Last, Seasons, Titles, Teams
+FROM    player_careers
+WHERE   Name = :player;
+"""
+
+SQL_CAREER_STATS = """
+SELECT  Source, Statistic, Titles, Best, Best_Year
+FROM    player_stat_careers
+WHERE   player_id = :player_id
+ORDER BY Titles DESC, Statistic;
+"""
+
+SQL_CAREER_LEADERS = """
+SELECT  c.Name, s.Titles, s.Best, s.Best_Year, c.First, c.Last
+FROM    player_stat_careers s
+JOIN    player_careers c USING (player_id)
+WHERE   s.Source = :source
+        AND s.Statistic = :stat
+ORDER BY s.Titles DESC, c.First
+LIMIT   :limit;
+"""
+
+SQL_CAREER_LEADERS_ALL = """
+SELECT  Name, Titles, Seasons, First, Last, Teams
+FROM    player_careers
+ORDER BY Titles DESC, First
+LIMIT   :limit;
+"""
+
 SQL_TEAM_SUMMARY = """
 SELECT Year, Team, Wins, Losses, WP, GB
 FROM   team_standings
@@ -77,6 +151,79 @@ WHERE  Team LIKE :team
 ORDER BY Year;
 """
 
+SQL_ERA_LEADERS = """
+SELECT  Year, {name}Team, Value, Z, Pct, Ratio
+FROM    era_stats
+WHERE   Source = :source
+        AND Statistic = :stat
+        AND Z IS NOT NULL
+        {year_clause}
+ORDER BY Z DESC
+LIMIT   :limit;
+"""
+
+SQL_RECORD_PROGRESSION = """
+SELECT  Year, Name, Team, Value,
+        Previous, Previous_Name, Previous_Year,
+        Year - Previous_Year AS Stood
+FROM    stat_records
+WHERE   Source = :source
+        AND Statistic = :stat
+        AND Broken = 1
+ORDER BY Year;
+"""
+
+SQL_CURRENT_RECORDS = """
+SELECT  r.Source, r.Statistic, r.Record, r.Record_Name AS Name, r.Record_Year AS Year,
+        r.Year - r.Record_Year AS Standing
+FROM    stat_records r
+WHERE   r.Year = (SELECT MAX(Year) FROM stat_records
+                  WHERE Source = r.Source AND Statistic = r.Statistic)
+ORDER BY r.Source, r.Statistic;
+"""
+
+SQL_STREAKS = """
+SELECT  Source, Statistic, Holder, Start, End, Length
+FROM    leader_streaks
+WHERE   Kind = :kind
+        {stat_clause}
+ORDER BY Length DESC, Start
+LIMIT   :limit;
+"""
+
+SQL_REPEAT_LEADERS = """
+SELECT  Source, Statistic, Holder, Titles, First, Last, Longest
+FROM    leader_counts
+WHERE   Kind = :kind
+        {stat_clause}
+ORDER BY Titles DESC, First
+LIMIT   :limit;
+"""
+
+
+def _has_table(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+
+def run_numpy(args):
+    """Built-in queries answered from nl_store.StatsStore."""
+    store = nl_store.StatsStore.from_db(DB_PATH)
+    if args.command == "top_players":
+        return pd.DataFrame(store.leaderboard(
+            args.stat, args.source, start=args.year, end=args.year,
+            limit=args.limit, with_record=True))
+
+    if args.command == "player_team":
+        sources = PLAYER_SOURCES if args.source == "all" else [args.source]
+        df = pd.DataFrame(store.player_rows(args.player, sources, with_record=True))
+        return df[["Year", "Team", "Wins", "Losses", "Statistic", "Value"]]
+
+    if args.command == "team_summary":
+        return pd.DataFrame(store.team_history(args.team, start=args.year,
+                                               end=args.year))
+
+
 # Main function to parse arguments and run queries
 def run():
     if not DB_PATH.exists():
@@ -84,14 +231,20 @@ def run():
 
     parser = argparse.ArgumentParser(
         description="Query National-League SQLite database")
+    parser.add_argument("--engine", choices=["sql", "numpy"], default="sql",
+                        help="Answer built-in queries with SQL (default) or the "
+                             "in-memory NumPy store")
     sub = parser.add_subparsers(dest="command", required=True)
 
     # top_players
     sp = sub.add_parser("top_players",
                         help="Leaderboard for a hitting stat (JOIN with standings)")
     sp.add_argument("--stat", required=True,
-                    help='Column name exactly as in CSV header '
+                    help='Statistic exactly as in the leader tables '
                          '(e.g. "Home Runs", "Batting Average")')
+    sp.add_argument("--source", default="player_hitting",
+                    choices=["player_hitting", "player_pitching"],
+                    help="Leader table to rank (default player_hitting)")
     sp.add_argument("--year", type=int, help="Filter by single season")
     sp.add_argument("--limit", type=int, default=10, help="Rows to return (default 10)")
 
@@ -99,6 +252,39 @@ def run():
     sp = sub.add_parser("player_team",
                         help="Player’s season lines + team W-L record")
     sp.add_argument("--player", required=True, help='Exact player name in dataset')
+    sp.add_argument("--source", default="player_hitting",
+                    choices=[*PLAYER_SOURCES, "all"],
+                    help="Hitting, pitching or all titles (default player_hitting)")
+
+    # career
+    sp = sub.add_parser("career", help="Career summary for one player")
+    sp.add_argument("--player", required=True, help='Exact player name in dataset')
+
+    # career_leaders
+    sp = sub.add_parser("career_leaders",
+                        help="Most seasons leading a statistic (all statistics without --stat)")
+    sp.add_argument("--stat", help='Statistic (e.g. "Home Runs")')
+    sp.add_argument("--source", default="player_hitting", choices=PLAYER_SOURCES,
+                    help="Leader table of --stat (default player_hitting)")
+    sp.add_argument("--limit", type=int, default=10, help="Rows to return (default 10)")
+
+    # records
+    sp = sub.add_parser("records",
+                        help="Record progression of a statistic (current records without --stat)")
+    sp.add_argument("--stat", help='Statistic (e.g. "Home Runs")')
+    sp.add_argument("--source", default="player_hitting", choices=PLAYER_SOURCES,
+                    help="Leader table of --stat (default player_hitting)")
+
+    # streaks / repeat_leaders
+    for name, text in (("streaks", "Longest runs of consecutive seasons leading a statistic"),
+                       ("repeat_leaders", "Most seasons leading a statistic")):
+        sp = sub.add_parser(name, help=text + " (all statistics without --stat)")
+        sp.add_argument("--stat", help='Statistic (e.g. "Home Runs")')
+        sp.add_argument("--source", default="player_hitting", choices=PLAYER_SOURCES,
+                        help="Leader table of --stat (default player_hitting)")
+        sp.add_argument("--kind", default="player", choices=["player", "team"],
+                        help="Count by player or by the leader's club (default player)")
+        sp.add_argument("--limit", type=int, default=10, help="Rows to return (default 10)")
 
     # team_summary
     sp = sub.add_parser("team_summary",
@@ -106,26 +292,99 @@ def run():
     sp.add_argument("--team", required=True, help='Team name or substring')
     sp.add_argument("--year", type=int, help="Optional single season filter")
 
+    # era_leaders
+    sp = sub.add_parser("era_leaders",
+                        help="Cross-era leaderboard on era-normalized values")
+    sp.add_argument("--stat", required=True, help='Statistic (e.g. "Batting Average", "Wins")')
+    sp.add_argument("--source", default="player_hitting",
+                    choices=[*nl_store.SOURCES, "team_standings"],
+                    help="Leader table, or team_standings for Wins / Win %% "
+                         "(default player_hitting)")
+    sp.add_argument("--start", type=int, help="First season")
+    sp.add_argument("--end", type=int, help="Last season")
+    sp.add_argument("--limit", type=int, default=10, help="Rows to return (default 10)")
+
+    # similar
+    sp = sub.add_parser("similar", help="Seasons most like one player or team season")
+    who = sp.add_mutually_exclusive_group(required=True)
+    who.add_argument("--player", help="Exact player name")
+    who.add_argument("--team", help='Team name or unique substring (e.g. "Reds")')
+    sp.add_argument("--year", type=int, required=True, help="Season to match")
+    sp.add_argument("--limit", type=int, default=10, help="Rows to return (default 10)")
+    sp.add_argument("--other", action="store_true",
+                    help="Leave out the same player's / team's other seasons")
+
     # raw SQL
     sp = sub.add_parser("sql", help="Run custom SQL passed in quotes")
     sp.add_argument("query", help="SQL string (use double quotes in shell)")
 
     args = parser.parse_args()
 
+    if args.engine == "numpy" and args.command in NUMPY_COMMANDS:
+        try:
+            _print_df(run_numpy(args))
+        except (KeyError, sqlite3.Error) as e:
+            sys.exit(f"Store error: {e}")
+        return
+
     conn = sqlite3.connect(DB_PATH)
     try:
         if args.command == "top_players":
             sql = SQL_TOP_PLAYERS.format(
-                stat=args.stat,
+                table=nl_store.SOURCES[args.source],
+                order="ASC" if nl_store.lower_is_better(args.stat) else "DESC",
                 year_clause="AND p.Year = :year" if args.year else ""
             )
             df = pd.read_sql_query(sql, conn,
-                                   params={"year": args.year, "limit": args.limit})
+                                   params={"stat": args.stat, "year": args.year,
+                                           "limit": args.limit})
             _print_df(df)
 
         elif args.command == "player_team":
-            df = pd.read_sql_query(SQL_PLAYER_TEAM, conn,
-                                   params={"player": args.player})
+            if _has_table(conn, "player_seasons"):
+                sql = SQL_PLAYER_TEAM.format(
+                    source_clause="" if args.source == "all" else "AND p.Source = :source")
+            else:
+                sources = PLAYER_SOURCES if args.source == "all" else [args.source]
+                sql = "SELECT * FROM (" + "UNION ALL".join(
+                    SQL_PLAYER_TEAM_LEADERS.format(table=nl_store.SOURCES[src])
+                    for src in sources) + ") ORDER BY Year;"
+            df = pd.read_sql_query(sql, conn,
+                                   params={"player": args.player, "source": args.source})
+            df["Value"] = [nl_store.to_number(v, s) for v, s in zip(df["Value"], df["Statistic"])]
+            _print_df(df)
+
+        elif args.command == "career":
+            df = pd.read_sql_query(SQL_CAREER, conn, params={"player": args.player})
+            _print_df(df)
+            if not df.empty:
+                print()
+                _print_df(pd.read_sql_query(
+                    SQL_CAREER_STATS, conn,
+                    params={"player_id": int(df.loc[0, "player_id"])}))
+
+        elif args.command == "career_leaders":
+            sql = SQL_CAREER_LEADERS if args.stat else SQL_CAREER_LEADERS_ALL
+            df = pd.read_sql_query(sql, conn,
+                                   params={"source": args.source, "stat": args.stat,
+                                           "limit": args.limit})
+            _print_df(df)
+
+        elif args.command == "records":
+            sql = SQL_RECORD_PROGRESSION if args.stat else SQL_CURRENT_RECORDS
+            df = pd.read_sql_query(sql, conn,
+                                   params={"source": args.source, "stat": args.stat})
+            if args.stat:     # the first record has no predecessor
+                df = df.astype({"Previous_Year": "Int64", "Stood": "Int64"})
+            _print_df(df)
+
+        elif args.command in ("streaks", "repeat_leaders"):
+            sql = SQL_STREAKS if args.command == "streaks" else SQL_REPEAT_LEADERS
+            sql = sql.format(stat_clause="AND Source = :source AND Statistic = :stat"
+                             if args.stat else "")
+            df = pd.read_sql_query(sql, conn,
+                                   params={"kind": args.kind, "source": args.source,
+                                           "stat": args.stat, "limit": args.limit})
             _print_df(df)
 
         elif args.command == "team_summary":
@@ -136,6 +395,27 @@ def run():
                                            "year": args.year})
             _print_df(df)
 
+        elif args.command == "era_leaders":
+            years = [c for c, v in (("AND Year >= :start", args.start),
+                                    ("AND Year <= :end", args.end)) if v is not None]
+            sql = SQL_ERA_LEADERS.format(
+                name="" if args.source.startswith("team") else "Name, ",
+                year_clause=" ".join(years))
+            df = pd.read_sql_query(sql, conn,
+                                   params={"source": args.source, "stat": args.stat,
+                                           "start": args.start, "end": args.end,
+                                           "limit": args.limit})
+            _print_df(df)
+
+        elif args.command == "similar":
+            index = nl_similar.SeasonIndex.from_db(conn, "player" if args.player else "team")
+            try:
+                result = index.similar(args.player or args.team, args.year,
+                                       k=args.limit, exclude_same=args.other)
+            except KeyError as e:
+                sys.exit(f"❌ {e.args[0]}")
+            _print_df(pd.DataFrame(result))
+
         elif args.command == "sql":
             df = pd.read_sql_query(args.query, conn)
             _print_df(df)
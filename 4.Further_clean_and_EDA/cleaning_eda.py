@@ -1,16 +1,37 @@
 import pandas as pd
 import numpy as np
-import re
+import argparse, re, sys
+from pathlib import Path
 
-# File paths for v2
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # shared nl_* modules
+import nl_config, nl_metrics, nl_parse
+
+# File paths for v2 (clean_dir from nl_pipeline.json)
 files = {
-    "player_hitting": "../3.National_League_Cleaned/player_hitting_leadersv2.csv",
-    "player_pitching": "../3.National_League_Cleaned/player_pitching_leadersv2.csv",
-    "team_hitting": "../3.National_League_Cleaned/team_hitting_leadersv2.csv",
-    "team_pitching": "../3.National_League_Cleaned/team_pitching_leadersv2s.csv",
-    "team_standings": "../3.National_League_Cleaned/team_standingsv2.csv"
+    "player_hitting": nl_config.table_csv("player_hitting_leaders"),
+    "player_pitching": nl_config.table_csv("player_pitching_leaders"),
+    "team_hitting": nl_config.table_csv("team_hitting_leaders"),
+    "team_pitching": nl_config.table_csv("team_pitching_leaders"),
+    "team_standings": nl_config.table_csv("team_standings")
 }
 
+# Tables whose '#' column gets cleaned in place; in the others only rate values
+# missing their dot are fixed (player_hitting), or nothing (team_standings)
+CLEANED = ["player_pitching", "team_hitting", "team_pitching"]
+
+# Averages / percentages scraped without their dot ('335') → thousandths,
+# the same rule nl_parse.typed applies to streamed loads
+def rescale_rate_stats(df, col="#"):
+    df_copy = df.copy()
+    values, changed = [], 0
+    for stat, val in zip(df["Statistic"], df[col]):
+        new = nl_parse.rate_value(stat, val)
+        changed += new is not val
+        values.append(new)
+    df_copy[col] = values
+    print(f"Rate values rescaled in '{col}': {changed}")
+    return df_copy, changed
+
 # Function to clean problematic numeric columns with commas, symbols, etc.
 def clean_numeric_column(df, col="#"):
     df_copy = df.copy()
@@ -29,46 +50,39 @@ def clean_numeric_column(df, col="#"):
     df_copy[col] = df_copy[col].round(3)
     return df_copy
 
-# Load and process Player Hitting
-df_ph = pd.read_csv(files["player_hitting"])
-print("\n=== Player Hitting Data Types ===")
-print(df_ph.dtypes)
-print(df_ph.head())
-
-# Load and process Player Pitching
-df_pp = pd.read_csv(files["player_pitching"])
-print("\n=== Player Pitching Data Types Before Cleaning ===")
-print(df_pp.dtypes)
-print(df_pp.head())
-
-df_pp_clean = clean_numeric_column(df_pp)
-df_pp_clean.to_csv(files["player_pitching"], index=False)
-print(f"✅ Cleaned and saved: {files['player_pitching']}")
+# Load, review and (for CLEANED tables) clean one file
+def process(key, m):
+    title = key.replace("_", " ").title()
+    with m.file(files[key]):
+        df = pd.read_csv(files[key])
+        m.read(files[key], rows=len(df))
+        suffix = " Before Cleaning" if key in CLEANED else ""
+        print(f"\n=== {title} Data Types{suffix} ===")
+        print(df.dtypes)
+        print(df.head())
 
-# Load and process Team Hitting
-df_th = pd.read_csv(files["team_hitting"])
-print("\n=== Team Hitting Data Types Before Cleaning ===")
-print(df_th.dtypes)
-print(df_th.head())
+        if key in CLEANED:
+            df = clean_numeric_column(df)
+        changed = 0
+        if "Statistic" in df.columns:
+            df, changed = rescale_rate_stats(df)
 
-df_th_clean = clean_numeric_column(df_th)
-df_th_clean.to_csv(files["team_hitting"], index=False)
-print(f"✅ Cleaned and saved: {files['team_hitting']}")
+        if key not in CLEANED and not changed:
+            print(f"\n✅ {title} reviewed - no numeric cleaning applied.")
+            return
 
-# Load and process Team Pitching
-df_tp = pd.read_csv(files["team_pitching"])
-print("\n=== Team Pitching Data Types Before Cleaning ===")
-print(df_tp.dtypes)
-print(df_tp.head())
+        df.to_csv(files[key], index=False)
+        m.wrote(files[key], rows=len(df))
+        print(f"✅ Cleaned and saved: {files[key]}")
 
-df_tp_clean = clean_numeric_column(df_tp)
-df_tp_clean.to_csv(files["team_pitching"], index=False)
-print(f"✅ Cleaned and saved: {files['team_pitching']}")
 
-# Load and process Team Standings
-df_ts = pd.read_csv(files["team_standings"])
-print("\n=== Team Standings Sample ===")
-print(df_ts.dtypes)
-print(df_ts.head())
+parser = argparse.ArgumentParser(description="Review and clean the v2 CSVs")
+parser.add_argument("--table", choices=list(files), action="append",
+                    help="Only process this table (repeatable; default all)")
+nl_metrics.add_arguments(parser)
+args = nl_metrics.configure(parser.parse_args())
 
-print("\n✅ Team Standings reviewed - no '#' column expected here, so no numeric cleaning applied.")
+stage_name = "clean_" + "_".join(args.table) if args.table else "clean"
+with nl_metrics.stage(stage_name) as m:
+    for key in args.table or files:
+        process(key, m)
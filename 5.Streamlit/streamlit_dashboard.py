@@ -3,6 +3,13 @@ import sqlite3
 import pandas as pd
 import plotly.express as px
 import numpy as np
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # shared nl_* modules
+import nl_config, nl_db, nl_similar
+from nl_store import SOURCES, StatsStore
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -13,27 +20,96 @@ st.set_page_config(
 )
 
 # --- Database Connection ---
-DB_PATH = "5.national_league.db"
+DB_PATH = nl_config.path("db_path")   # set in nl_pipeline.json
 
 def get_connection():
     return sqlite3.connect(DB_PATH)
 
+def db_state(tables):
+    """
+    Cache key for data read from *tables*: the DB build id (new on every full
+    load) plus their table_versions (bumped by every load / --season update).
+    Versions alone restart at 1 when the DB is rebuilt.
+    """
+    conn = get_connection()
+    try:
+        build = nl_db.build_id(conn)
+        versions = nl_db.table_versions(conn, tables)
+    finally:
+        conn.close()
+    return (build, *(versions.get(t, 0) for t in tables))
+
 @st.cache_data
-def run_query(query):
+def _cached_query(query, params, state):
     try:
         conn = get_connection()
-        df = pd.read_sql_query(query, conn)
+        df = pd.read_sql_query(query, conn, params=params)
         conn.close()
         return df
     except Exception as e:
         st.error(f"Error executing query: {e}")
         return pd.DataFrame()
 
+def run_query(query, params=()):
+    """
+    Cached on the query *and* the state of the tables it reads, so a
+    season update only re-runs the queries on tables it actually changed.
+    """
+    tables = sorted(set(re.findall(r"\b(?:FROM|JOIN)\s+(\w+)", query, re.IGNORECASE)))
+    return _cached_query(query, tuple(params), db_state(tables))
+
+# --- In-memory store (reloaded only when a source table changes) ---
+@st.cache_resource(max_entries=1)
+def _load_store(state):
+    return StatsStore.from_db(DB_PATH)
+
+def get_store():
+    tables = [*SOURCES.values(), "team_standings"]
+    return _load_store(db_state(tables))
+
+# --- Similar-season index (reloaded only when season_vectors changes) ---
+@st.cache_resource(max_entries=2)
+def _load_index(kind, state):
+    conn = get_connection()
+    try:
+        return nl_similar.SeasonIndex.from_db(conn, kind)
+    finally:
+        conn.close()
+
+def get_index(kind):
+    return _load_index(kind, db_state(nl_similar.TABLES))
+
+def store_query(source, stat):
+    """Leader rows for *stat* in the selected years, best value first per Year."""
+    try:
+        rows = get_store().year_slice(stat, source, year_range[0], year_range[1])
+    except KeyError:
+        return pd.DataFrame()
+    return pd.DataFrame(rows)
+
+def era_query(source, stat):
+    """Era-adjusted z-scores (higher = better) from the materialized era_stats table."""
+    return run_query("""
+    SELECT Year, Name, Team, Z as Value
+    FROM era_stats
+    WHERE Source = ? AND Statistic = ? AND Z IS NOT NULL
+    AND Year BETWEEN ? AND ?
+    ORDER BY Year, Z DESC
+    """, (source, stat, year_range[0], year_range[1]))
+
 # --- Sidebar Filters ---
 st.sidebar.header("Filters")
 
+engine = st.sidebar.radio("Query engine", ["SQLite", "NumPy store"],
+                          help="NumPy store answers the leader queries from "
+                               "in-memory arrays instead of SQL")
+use_store = engine == "NumPy store"
+
+era_adjusted = st.sidebar.checkbox(
+    "Era-adjusted values", value=False,
+    help="Show each value as a z-score against its era (higher is always better)")
+
 # Get available years
-@st.cache_data
 def get_years():
     query = "SELECT DISTINCT Year FROM player_hitting_leaders ORDER BY Year"
     df = run_query(query)
@@ -51,7 +127,6 @@ year_range = st.sidebar.slider(
 )
 
 # Get Hitting and Pitching Statistics
-@st.cache_data
 def get_stats(table):
     query = f"SELECT DISTINCT Statistic FROM {table} ORDER BY Statistic"
     df = run_query(query)
@@ -61,7 +136,9 @@ hitting_stats = get_stats("player_hitting_leaders")
 pitching_stats = get_stats("player_pitching_leaders")
 
 # --- Dashboard Tabs ---
-tab1, tab2, tab3 = st.tabs(["Hitting Leaders", "Pitching Performance", "Team Analysis"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Hitting Leaders", "Pitching Performance",
+                                              "Team Analysis", "Player Careers",
+                                              "Similar Seasons", "Records & Streaks"])
 
 # --- Tab 1: Hitting Leaders ---
 with tab1:
@@ -76,7 +153,12 @@ with tab1:
     AND Year BETWEEN {year_range[0]} AND {year_range[1]}
     ORDER BY Year, Value DESC
     """
-    df = run_query(query)
+    if era_adjusted:
+        df = era_query("player_hitting", selected_hitting_stat)
+    elif use_store:
+        df = store_query("player_hitting", selected_hitting_stat)
+    else:
+        df = run_query(query)
 
     if not df.empty:
         df['Value'] = pd.to_numeric(df['Value'], errors='coerce')
@@ -116,14 +198,19 @@ with tab2:
     AND Year BETWEEN {year_range[0]} AND {year_range[1]}
     ORDER BY Year, Value
     """
-    df = run_query(query)
+    if era_adjusted:
+        df = era_query("player_pitching", selected_pitching_stat)
+    elif use_store:
+        df = store_query("player_pitching", selected_pitching_stat)
+    else:
+        df = run_query(query)
 
     if not df.empty:
         df['Value'] = pd.to_numeric(df['Value'], errors='coerce')
 
         top_n = st.slider("Top Pitchers per Year", 1, 10, 3)
 
-        if selected_pitching_stat == "ERA":
+        if selected_pitching_stat == "ERA" and not era_adjusted:
             df = df.sort_values(["Year", "Value"], ascending=[True, True])
         else:
             df = df.sort_values(["Year", "Value"], ascending=[True, False])
@@ -131,7 +218,8 @@ with tab2:
         top_df = df.groupby("Year").head(top_n)
 
         fig3 = px.scatter(
-            top_df, x="Year", y="Value", color="Name", size="Value",
+            top_df, x="Year", y="Value", color="Name",
+            size=None if era_adjusted else "Value",     # z-scores go negative
             trendline="lowess",
             title=f"Top {top_n} {selected_pitching_stat} Leaders Over Time"
         )
@@ -164,14 +252,19 @@ with tab3:
     AND Year BETWEEN {year_range[0]} AND {year_range[1]}
     ORDER BY Year, Value DESC
     """
-    df = run_query(query)
+    if era_adjusted:
+        df = era_query(table.replace("_leaders", ""), selected_team_stat)
+    elif use_store:
+        df = store_query(table.replace("_leaders", ""), selected_team_stat)
+    else:
+        df = run_query(query)
 
     if not df.empty:
         df['Value'] = pd.to_numeric(df['Value'], errors='coerce')
 
         pivot = df.pivot(index="Team", columns="Year", values="Value").fillna(0)
 
-        color_scale = 'RdYlGn_r' if selected_team_stat == "ERA" else 'RdYlGn'
+        color_scale = 'RdYlGn_r' if selected_team_stat == "ERA" and not era_adjusted else 'RdYlGn'
 
         fig5 = px.imshow(
             pivot,
@@ -193,6 +286,165 @@ with tab3:
     else:
         st.warning("No team data available for the selected filters.")
 
+# --- Tab 4: Player Careers ---
+with tab4:
+    st.header("Player Careers (National League)")
+
+    # career tables are precomputed by create_nl_db.py (nl_careers.py)
+    leaders_df = run_query("""
+    SELECT Name, Titles, Seasons, First, Last
+    FROM player_careers
+    ORDER BY Titles DESC, First
+    LIMIT 15
+    """)
+
+    if not leaders_df.empty:
+        fig7 = px.bar(
+            leaders_df, x="Name", y="Titles", color="Seasons",
+            title="Most League-Leading Titles (All Statistics)"
+        )
+        fig7.update_layout(xaxis_tickangle=-45)
+        st.plotly_chart(fig7, use_container_width=True)
+
+        players = run_query("SELECT Name FROM player_careers ORDER BY Titles DESC, Name")
+        selected_player = st.selectbox("Select Player", players['Name'].tolist())
+
+        career = run_query(f"""
+        SELECT player_id, First, Last, Seasons, Titles, Teams
+        FROM player_careers
+        WHERE Name = '{selected_player.replace("'", "''")}'
+        """)
+        player_id = int(career.loc[0, 'player_id'])
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Seasons", f"{career.loc[0, 'First']}–{career.loc[0, 'Last']}")
+        c2.metric("Seasons Leading", int(career.loc[0, 'Seasons']))
+        c3.metric("Titles", int(career.loc[0, 'Titles']))
+        c4.metric("Teams", career.loc[0, 'Teams'])
+
+        timeline = run_query(f"""
+        SELECT Year, Source, Statistic, Team, Value
+        FROM player_seasons
+        WHERE player_id = {player_id}
+        ORDER BY Year
+        """)
+        fig8 = px.scatter(
+            timeline, x="Year", y="Statistic", color="Team", symbol="Source",
+            hover_data=["Value"],
+            title=f"{selected_player}: Statistics Led by Season"
+        )
+        st.plotly_chart(fig8, use_container_width=True)
+
+        st.dataframe(run_query(f"""
+        SELECT Statistic, Titles, Best, Best_Year
+        FROM player_stat_careers
+        WHERE player_id = {player_id}
+        ORDER BY Titles DESC, Statistic
+        """), use_container_width=True)
+    else:
+        st.warning("No career data available. Run create_nl_db.py first.")
+
+# --- Tab 5: Similar Seasons ---
+with tab5:
+    st.header("Similar Seasons")
+
+    # vectors are precomputed by create_nl_db.py (nl_similar.py)
+    kind = st.radio("Compare", ["player", "team"], horizontal=True,
+                    format_func=lambda k: k.title() + " seasons")
+    try:
+        index = get_index(kind)
+    except (KeyError, sqlite3.OperationalError):
+        index = None
+
+    if index is not None:
+        names = sorted(set(index.names))
+        default = "Barry Bonds" if kind == "player" else "Cincinnati Reds"
+        c1, c2, c3 = st.columns([3, 1, 1])
+        selected_name = c1.selectbox("Name", names,
+                                     index=names.index(default) if default in names else 0)
+        seasons = sorted(int(y) for y in index.years[index.names == selected_name])
+        selected_year = c2.selectbox("Season", seasons, index=len(seasons) - 1)
+        k = c3.slider("Matches", 5, 25, 10)
+        other_only = st.checkbox("Only other players / teams", value=True)
+
+        similar_df = pd.DataFrame(index.similar(selected_name, selected_year, k=k,
+                                                exclude_same=other_only))
+        if not similar_df.empty:
+            similar_df["Season"] = similar_df["Name"] + " " + similar_df["Year"].astype(str)
+            fig9 = px.bar(
+                similar_df, x="Similarity", y="Season", orientation="h",
+                hover_data=["Team", "Distance", "Shared"],
+                title=f"Seasons Most Like {selected_name} {selected_year}"
+            )
+            fig9.update_layout(yaxis={"categoryorder": "total ascending"})
+            st.plotly_chart(fig9, use_container_width=True)
+            st.dataframe(similar_df.drop(columns="Season"), use_container_width=True)
+    else:
+        st.warning("No season vectors available. Run create_nl_db.py first.")
+
+# --- Tab 6: Records & Streaks ---
+with tab6:
+    st.header("Single-Season Records & Leader Streaks")
+
+    # record / streak tables are precomputed by create_nl_db.py (nl_records.py)
+    c1, c2 = st.columns(2)
+    record_source = c1.radio("Leader table", ["player_hitting", "player_pitching"],
+                             horizontal=True, format_func=lambda s: s.split("_")[1].title())
+    record_stats = hitting_stats if record_source == "player_hitting" else pitching_stats
+    record_stat = c2.selectbox("Statistic", record_stats,
+                               index=record_stats.index("Home Runs")
+                               if "Home Runs" in record_stats else 0)
+    stat_filter = (f"Source = '{record_source}' "
+                   f"AND Statistic = '{record_stat.replace(chr(39), chr(39) * 2)}'")
+
+    records_df = run_query(f"""
+    SELECT Year, Name, Team, Value, Record, Record_Name, Broken,
+           Previous, Previous_Name, Previous_Year
+    FROM stat_records
+    WHERE {stat_filter}
+    ORDER BY Year
+    """)
+
+    if not records_df.empty:
+        fig10 = px.line(
+            records_df, x="Year", y=["Value", "Record"], line_shape="hv",
+            hover_data=["Name", "Record_Name"],
+            title=f"{record_stat}: League Leader vs. NL Record"
+        )
+        broken = records_df[records_df["Broken"] == 1]
+        fig10.add_scatter(x=broken["Year"], y=broken["Value"], mode="markers",
+                          marker={"size": 10, "symbol": "star"}, name="New record",
+                          text=broken["Name"])
+        st.plotly_chart(fig10, use_container_width=True)
+
+        st.subheader("Record Progression")
+        progression = broken[["Year", "Name", "Team", "Value",
+                              "Previous", "Previous_Name", "Previous_Year"]].copy()
+        progression["Stood"] = progression["Year"] - progression["Previous_Year"]
+        st.dataframe(progression, use_container_width=True)
+
+        streak_kind = st.radio("Streaks by", ["player", "team"], horizontal=True,
+                               format_func=lambda k: "Club" if k == "team" else "Player")
+        c3, c4 = st.columns(2)
+        c3.subheader("Longest Leader Streaks")
+        c3.dataframe(run_query(f"""
+        SELECT Holder, Start, End, Length
+        FROM leader_streaks
+        WHERE {stat_filter} AND Kind = '{streak_kind}'
+        ORDER BY Length DESC, Start
+        LIMIT 10
+        """), use_container_width=True)
+        c4.subheader("Most Seasons Leading")
+        c4.dataframe(run_query(f"""
+        SELECT Holder, Titles, First, Last, Longest
+        FROM leader_counts
+        WHERE {stat_filter} AND Kind = '{streak_kind}'
+        ORDER BY Titles DESC, First
+        LIMIT 10
+        """), use_container_width=True)
+    else:
+        st.warning("No record data available. Run create_nl_db.py first.")
+
 # --- Footer ---
 st.markdown("---")
 st.caption("© 2025 National League Baseball Dashboard | Built with Streamlit")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+api_load_test.py
+----------------
+Concurrent load test for nl_api_server.py: N keep-alive clients fire a mix of
+endpoint requests for a fixed duration, then throughput and latency
+percentiles are reported.
+
+  python api_load_test.py --clients 128 --duration 10
+  python api_load_test.py --start-server --clients 200 --etag
+
+--etag replays each response's ETag as If-None-Match (revalidating clients,
+mostly 304s); without it every request gets a full 200 body from the cache.
+"""
+
+import argparse, asyncio, itertools, json, logging, random, subprocess, sys, time
+from pathlib import Path
+from urllib.parse import quote
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s  %(levelname)s  %(message)s")
+
+SERVER = Path(__file__).with_name("nl_api_server.py")
+
+# request mix — roughly what the dashboard and query_nl_db.py ask for
+PATHS = [
+    "/leaderboard?stat={hit}&start={start}&end={end}",
+    "/leaderboard?stat={pitch}&source=player_pitching&start={start}&end={end}",
+    "/era_leaders?stat={hit}&limit=25",
+    "/team_summary?team={team}",
+    "/player?name={player}",
+    "/career?name={player}",
+]
+HITTING = ["Home Runs", "Batting Average", "RBI", "Hits", "Stolen Bases"]
+PITCHING = ["ERA", "Strikeouts", "Wins", "Shutouts"]
+TEAMS = ["Cincinnati", "St. Louis", "Chicago", "Pittsburgh", "Brooklyn", "Atlanta"]
+PLAYERS = ["Stan Musial", "Willie Mays", "Hank Aaron", "Barry Bonds", "Sandy Koufax",
+           "Honus Wagner", "Mike Schmidt", "Tony Gwynn"]
+
+
+def make_targets(n=150, seed=7):
+    """Up to *n* distinct request targets from the mix (so the server cache warms up)."""
+    values = {"hit": HITTING, "pitch": PITCHING, "team": TEAMS, "player": PLAYERS,
+              "start": range(1880, 2011, 10)}
+    targets = []
+    for path in PATHS:
+        fields = [f for f in values if "{" + f + "}" in path]
+        for combo in itertools.product(*(values[f] for f in fields)):
+            kw = dict(zip(fields, combo))
+            if "start" in kw:
+                kw["end"] = kw["start"] + 9
+            targets.append(path.format(**{k: quote(str(v)) for k, v in kw.items()}))
+    return sorted(random.Random(seed).sample(targets, min(n, len(targets))))
+
+
+async def fetch(reader, writer, host, target, etag=None):
+    """One keep-alive GET → (status, etag)."""
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    headers = {k.strip().lower(): v.strip()
+               for k, v in (l.split(":", 1) for l in head[1:] if ":" in l)}
+    length = int(headers.get("content-length", 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get("etag")
+
+
+async def client(host, port, targets, deadline, use_etag, latencies, statuses, seed):
+    rnd = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = rnd.choice(targets)
+            t0 = time.perf_counter()
+            status, tag = await fetch(reader, writer, host, target,
+                                      etags.get(target) if use_etag else None)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+            if tag:
+                etags[target] = tag
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    i = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+async def wait_ready(host, port, timeout=15):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            status, _ = await fetch(reader, writer, host, "/health")
+            writer.close()
+            if status == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError):
+            await asyncio.sleep(0.2)
+    sys.exit(f"❌ API server on {host}:{port} did not come up")
+
+
+async def main(args):
+    await wait_ready(args.host, args.port)
+    targets = make_targets(args.targets)
+    latencies, statuses = [], {}
+
+    # warm-up pass so the run measures steady state
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    for t in targets:
+        await fetch(reader, writer, args.host, t)
+    writer.close()
+
+    logging.info("🏁 %s clients × %ss against %s:%s (%s targets, etag=%s)",
+                 args.clients, args.duration, args.host, args.port, len(targets), args.etag)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(args.host, args.port, targets, deadline, args.etag,
+                                  latencies, statuses, seed=i)
+                           for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    lat = sorted(x * 1000 for x in latencies)
+    report = {
+        "clients": args.clients, "duration_s": round(elapsed, 2), "requests": len(lat),
+        "throughput_rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(percentile(lat, 50), 2), "p95_ms": round(percentile(lat, 95), 2),
+        "p99_ms": round(percentile(lat, 99), 2), "max_ms": round(lat[-1], 2) if lat else None,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test nl_api_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=128,
+                        help="Concurrent keep-alive clients (default 128)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds (default 10)")
+    parser.add_argument("--targets", type=int, default=150,
+                        help="Distinct request URLs in the mix (default 150)")
+    parser.add_argument("--etag", action="store_true",
+                        help="Revalidate with If-None-Match (expect mostly 304s)")
+    parser.add_argument("--start-server", action="store_true",
+                        help="Launch nl_api_server.py for the duration of the test")
+    args = parser.parse_args()
+
+    proc = None
+    if args.start_server:
+        proc = subprocess.Popen([sys.executable, str(SERVER), "--host", args.host,
+                                 "--port", str(args.port)])
+    try:
+        asyncio.run(main(args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
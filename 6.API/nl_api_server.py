@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+"""
+nl_api_server.py
+----------------
+Read-only JSON API over the pipeline DB for BI tools and dashboards, so they
+share one process (and one cache) instead of each opening the DB.
+
+Endpoints (GET, query-string parameters)
+• /leaderboard   stat, source=player_hitting, start, end, limit=10
+• /era_leaders   stat, source=player_hitting, start, end, limit=10
+• /team_summary  team (substring), start, end
+• /player        name, source=all            season-by-season timeline
+• /career        name                        career summary + per-stat titles
+• /statistics    source=player_hitting
+• /health        DB fingerprint, cache stats
+
+Serving
+• asyncio HTTP/1.1 with keep-alive, standard library only
+• a pool of read-only SQLite connections (nl_db.connect_ro); queries run in
+  a thread pool of the same size so the event loop never blocks
+• responses are cached in-process (LRU) and carry an ETag derived from the DB
+  fingerprint (PRAGMA user_version, bumped by every load) — a matching
+  If-None-Match gets 304 without touching the DB, and identical concurrent
+  misses share one query
+
+Usage
+  python nl_api_server.py --port 8765 --pool 4
+  curl 'http://127.0.0.1:8765/leaderboard?stat=Home%20Runs&start=1950&end=1959'
+"""
+
+import argparse, asyncio, hashlib, json, logging, os, sys, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # shared nl_* modules
+import nl_config, nl_db, nl_store
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s  %(levelname)s  %(message)s")
+
+DB_PATH = nl_config.path("db_path")   # set in nl_pipeline.json
+FINGERPRINT_TTL = 1.0                 # seconds between user_version checks
+MAX_HEADER = 16 * 1024
+
+PLAYER_SOURCES = ["player_hitting", "player_pitching"]
+ERA_SOURCES = [*nl_store.SOURCES, "team_standings"]
+
+# endpoint → (SQL template, {param: (type, default, choices)})
+# template fields are filled from the *validated* params only (table names,
+# ORDER direction, optional clauses); values always go through placeholders.
+ENDPOINTS = {
+    "/leaderboard": ("""
+        SELECT  p.Year, {name}p.Team,
+                CAST(REPLACE(p."#", ',', '') AS REAL) AS Value
+        FROM    {table} AS p
+        WHERE   p.Statistic = :stat AND p."#" IS NOT NULL
+                {year_clause}
+        ORDER BY Value {order}, p.Year
+        LIMIT   :limit""", {
+        "stat":   (str, None, None),
+        "source": (str, "player_hitting", list(nl_store.SOURCES)),
+        "start":  (int, None, None),
+        "end":    (int, None, None),
+        "limit":  (int, 10, None),
+    }),
+    "/era_leaders": ("""
+        SELECT  Year, Name, Team, Value, Z, Pct, Ratio
+        FROM    era_stats
+        WHERE   Source = :source AND Statistic = :stat AND Z IS NOT NULL
+                {year_clause}
+        ORDER BY Z DESC
+        LIMIT   :limit""", {
+        "stat":   (str, None, None),
+        "source": (str, "player_hitting", ERA_SOURCES),
+        "start":  (int, None, None),
+        "end":    (int, None, None),
+        "limit":  (int, 10, None),
+    }),
+    "/team_summary": ("""
+        SELECT  Year, Team, Wins, Losses, WP, GB
+        FROM    team_standings
+        WHERE   Team LIKE '%' || :team || '%' AND Wins IS NOT NULL
+                {year_clause}
+        ORDER BY Year""", {
+        "team":   (str, None, None),
+        "start":  (int, None, None),
+        "end":    (int, None, None),
+    }),
+    "/player": ("""
+        SELECT  p.Year, p.Team, p.Source, p.Statistic, p.Value
+        FROM    player_careers c
+        JOIN    player_seasons p USING (player_id)
+        WHERE   c.Name = :name
+                {source_clause}
+        ORDER BY p.Year""", {
+        "name":   (str, None, None),
+        "source": (str, "all", [*PLAYER_SOURCES, "all"]),
+    }),
+    "/career": ("""
+        SELECT  c.player_id, c.Name, c.First, c.Last, c.Seasons, c.Titles, c.Teams,
+                s.Source, s.Statistic, s.Titles AS Stat_Titles, s.Best, s.Best_Year
+        FROM    player_careers c
+        JOIN    player_stat_careers s USING (player_id)
+        WHERE   c.Name = :name
+        ORDER BY s.Titles DESC, s.Statistic""", {
+        "name":   (str, None, None),
+    }),
+    "/statistics": ("""
+        SELECT  Statistic
+        FROM    {table}
+        WHERE   "#" IS NOT NULL
+        GROUP BY Statistic
+        -- team tables carry a few header / tie rows with a club in Statistic
+        HAVING  COUNT(DISTINCT Year) > 3
+        ORDER BY Statistic""", {
+        "source": (str, "player_hitting", list(nl_store.SOURCES)),
+    }),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def build_query(path, query):
+    """Validate the query string → (sql, params) for one endpoint."""
+    template, spec = ENDPOINTS[path]
+    params = {}
+    for key, (kind, default, choices) in spec.items():
+        raw = query.get(key)
+        if raw is None or raw == "":
+            if default is None and kind is str:
+                raise BadRequest(f"missing parameter {key!r}")
+            params[key] = default
+            continue
+        try:
+            params[key] = kind(raw)
+        except ValueError:
+            raise BadRequest(f"{key} must be {kind.__name__}") from None
+        if choices and params[key] not in choices:
+            raise BadRequest(f"{key} must be one of {', '.join(choices)}")
+    if "limit" in params:
+        params["limit"] = max(1, min(params["limit"], 1000))
+
+    year = "p.Year" if path == "/leaderboard" else "Year"
+    years = [f"AND {year} {op} :{k}" for op, k in ((">=", "start"), ("<=", "end"))
+             if params.get(k) is not None]
+    source = params.get("source")
+    fields = {
+        "year_clause":   " ".join(years),
+        "table":         nl_store.SOURCES.get(source, ""),
+        "name":          "p.Name, " if source and source.startswith("player") else "",
+        "order":         "ASC" if nl_store.lower_is_better(params.get("stat") or "") else "DESC",
+        "source_clause": "" if source in (None, "all") else "AND p.Source = :source",
+    }
+    return template.format(**fields), params
+
+
+class Pool:
+    """Fixed set of read-only connections handed out through an asyncio.Queue."""
+
+    def __init__(self, db_path, size):
+        self.db_path, self.size = db_path, size
+        self.generation = 0
+        self.queue = asyncio.Queue()
+        self._fill()
+
+    def _fill(self):
+        for _ in range(self.size):
+            self.queue.put_nowait((self.generation, nl_db.connect_ro(self.db_path)))
+
+    def reset(self):
+        """DB file replaced: new connections; old ones close as they come back."""
+        self.generation += 1
+        while not self.queue.empty():
+            _, conn = self.queue.get_nowait()
+            conn.close()
+        self._fill()
+
+    async def acquire(self):
+        return await self.queue.get()
+
+    def release(self, item):
+        generation, conn = item
+        if generation == self.generation:
+            self.queue.put_nowait(item)
+        else:
+            conn.close()
+
+
+def _fetch(conn, sql, params):
+    cur = conn.execute(sql, params)
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+class StatsAPI:
+    def __init__(self, db_path, pool_size=4, cache_size=1024):
+        self.db_path = Path(db_path)
+        self.pool = Pool(db_path, pool_size)
+        self.executor = ThreadPoolExecutor(pool_size, thread_name_prefix="nl-api")
+        self.cache = OrderedDict()          # key → (fingerprint, etag, body)
+        self.cache_size = cache_size
+        self.inflight = {}                  # key → Future (coalesced misses)
+        self.fp, self.fp_checked, self.inode = None, 0.0, None
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "not_modified": 0}
+
+    async def run(self, fn, *args):
+        item = await self.pool.acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, fn, item[1], *args)
+        finally:
+            self.pool.release(item)
+
+    async def fingerprint(self):
+        """DB version string, re-read at most every FINGERPRINT_TTL seconds."""
+        now = time.monotonic()
+        if self.fp is None or now - self.fp_checked >= FINGERPRINT_TTL:
+            self.fp_checked = now
+            inode = os.stat(self.db_path).st_ino
+            if self.inode is not None and inode != self.inode:
+                self.pool.reset()
+            self.inode = inode
+            version = await self.run(nl_db.db_version)
+            fp = f"{inode}-{version}"
+            if fp != self.fp:
+                if self.fp is not None:
+                    logging.info("🔄 DB changed (%s → %s); cache cleared", self.fp, fp)
+                self.cache.clear()
+                self.fp = fp
+        return self.fp
+
+    @staticmethod
+    def etag(fp, key):
+        return '"' + hashlib.sha1(f"{fp}|{key}".encode()).hexdigest()[:20] + '"'
+
+    async def respond(self, target, if_none_match=None):
+        """→ (status, body bytes, headers dict)"""
+        self.stats["requests"] += 1
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        query = dict(parse_qsl(parts.query))
+
+        if path == "/health":
+            fp = await self.fingerprint()
+            body = {"status": "ok", "fingerprint": fp, "cache_entries": len(self.cache),
+                    **self.stats}
+            return 200, json.dumps(body).encode(), {"Cache-Control": "no-store"}
+        if path not in ENDPOINTS:
+            return 404, json.dumps({"error": f"unknown endpoint {path}",
+                                    "endpoints": sorted(ENDPOINTS)}).encode(), {}
+        try:
+            sql, params = build_query(path, query)
+        except BadRequest as e:
+            return 400, json.dumps({"error": str(e)}).encode(), {}
+
+        fp = await self.fingerprint()
+        key = path + "?" + json.dumps(params, sort_keys=True)
+        tag = self.etag(fp, key)
+        headers = {"ETag": tag, "Cache-Control": "no-cache"}
+        if if_none_match and tag in {t.strip() for t in if_none_match.split(",")}:
+            self.stats["not_modified"] += 1
+            return 304, b"", headers
+
+        entry = self.cache.get(key)
+        if entry and entry[0] == fp:
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return 200, entry[2], headers
+
+        self.stats["misses"] += 1
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, fp, tag, sql, params))
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        try:
+            body = await asyncio.shield(future)
+        except Exception as e:                      # sqlite3 errors, missing tables
+            return 500, json.dumps({"error": str(e)}).encode(), {}
+        return 200, body, headers
+
+    async def _load(self, key, fp, tag, sql, params):
+        rows = await self.run(_fetch, sql, params)
+        body = json.dumps({"count": len(rows), "rows": rows}).encode()
+        if fp == self.fp:
+            self.cache[key] = (fp, tag, body)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return body
+
+    # ── HTTP ────────────────────────────────────────────────────────────
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, b"", {}, "HTTP/1.1", close=True)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, b"", {}, "HTTP/1.1", close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                conn_hdr = headers.get("connection", "").lower()
+                close = conn_hdr == "close" or (version == "HTTP/1.0" and
+                                                conn_hdr != "keep-alive")
+
+                if method not in ("GET", "HEAD"):
+                    status, body, extra = 405, b"", {"Allow": "GET, HEAD"}
+                else:
+                    status, body, extra = await self.respond(
+                        target, headers.get("if-none-match"))
+                await self._send(writer, status, b"" if method == "HEAD" else body,
+                                 extra, version, close, length=len(body))
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 431: "Request Header Fields Too Large",
+               500: "Internal Server Error"}
+
+    async def _send(self, writer, status, body, headers, version, close=False, length=None):
+        lines = [f"{version} {status} {self.REASONS[status]}"]
+        if status != 304:
+            lines += ["Content-Type: application/json",
+                      f"Content-Length: {len(body) if length is None else length}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        lines.append("Connection: close" if close else "Connection: keep-alive")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, pool_size, cache_size):
+    if not DB_PATH.exists():
+        sys.exit(f"❌ Database {DB_PATH} not found. Run create_nl_db.py first.")
+    api = StatsAPI(DB_PATH, pool_size, cache_size)
+    await api.fingerprint()
+    server = await asyncio.start_server(api.handle, host, port, limit=MAX_HEADER,
+                                        backlog=1024)
+    logging.info("🚀 Serving %s on http://%s:%s (pool=%s)", DB_PATH.name, host, port,
+                 pool_size)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only JSON API for the NL database")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default 8765)")
+    parser.add_argument("--pool", type=int, default=4,
+                        help="Read-only connections / query threads (default 4)")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="Cached responses kept (default 1024)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.pool, args.cache_size))
+    except KeyboardInterrupt:
+        logging.info("Stopped.")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+check_nl_db.py
+--------------
+Consistency checks for the pipeline DB (`db_path` in nl_pipeline.json).
+Each check logs what it found and exits 1 on a failure, so it can gate a
+pipeline run or a commit.
+
+  python check_nl_db.py era     era_stats: no value OUTLIER_FACTOR× off its
+                                reference group, and the outlier guard itself
+                                still catches a single-row unit slip
+  python check_nl_db.py season  --season round trip: load a temp DB, edit
+                                one season's raw table, update the DB with
+                                create_nl_db.py --season and compare every
+                                table (DERIVED included) with a full rebuild
+                                from the edited raw tables (--year, default
+                                SEASON_YEAR; builds in a temp dir, the
+                                pipeline DB is not touched)
+  python check_nl_db.py export  export, rebuild the DB into a new file from an
+                                edited season (table versions restart at 1),
+                                export again: the CSV must show the new value,
+                                not "unchanged — skipped" (temp dir, --year)
+"""
+
+import argparse, csv, logging, os, re, shutil, sqlite3, subprocess, sys, tempfile
+from pathlib import Path
+
+import numpy as np
+
+import nl_config, nl_era
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s  %(levelname)s  %(message)s")
+
+DB_PATH = nl_config.path("db_path")
+ROOT_DIR = Path(__file__).resolve().parent
+SEASON_YEAR = 1981
+EXPORT_SCRIPT = "3.National_League_Cleaned/export_nl_clean_csvs.py"
+SEASON_EDIT = re.compile(r"^(Home Runs,[^,]*,[^,]*,)(\d+)", re.M)   # +10 HR for the leader
+
+# Raw-data errors the outlier guard is expected to find (scraped as shown)
+KNOWN_OUTLIERS = {
+    ("player_hitting", "Total Bases", 1981),     # Mike Schmidt '.228' (228)
+    ("player_hitting", "Hits", 2022),            # Freddie Freeman '11'
+}
+
+
+def check_era_guard():
+    """A lone 335 among .300 leaders (1968 before the rescale) must be flagged."""
+    years = np.arange(1958, 1979)
+    values = np.full(len(years), 0.320) + np.linspace(-0.02, 0.03, len(years))
+    values[years == 1968] = 335.0
+    bad = nl_era.outliers(years, values)
+    if list(years[bad]) != [1968]:
+        return [f"outliers() flagged {list(years[bad])}, expected [1968]"]
+    z, _, ratio = nl_era.normalize(years[~bad], values[~bad])
+    if np.nanmax(np.abs(z)) > 3 or np.nanmin(ratio) < 0.5:
+        return ["one outlier still distorts the rest of its window"]
+    return []
+
+
+def check_era(conn, args):
+    failures = check_era_guard()
+    groups = {}
+    for src, stat, year, who, value, z in conn.execute(
+            "SELECT Source, Statistic, Year, COALESCE(Name, Team), Value, Z FROM era_stats"):
+        groups.setdefault((src, stat), []).append((year, who, value, z))
+
+    for (src, stat), rows in sorted(groups.items()):
+        years, _, values, zs = zip(*rows)
+        window = 0 if src == "team_standings" else nl_era.ERA_WINDOW
+        for i in np.flatnonzero(nl_era.outliers(years, values, window)):
+            year, who, value, z = rows[i]
+            line = f"{src} {stat} {year} {who}: {value}"
+            if z is not None:
+                failures.append(f"{line} is an outlier but was normalized (Z {z})")
+            elif (src, stat, year) in KNOWN_OUTLIERS:
+                logging.info("known raw-data error, not normalized: %s", line)
+            else:
+                failures.append(f"{line} is {nl_era.OUTLIER_FACTOR}× off its era")
+    return failures
+
+
+def _run(script, raw_dir, db_path, *args, **paths):
+    """Run a pipeline *script* on *raw_dir* / *db_path*; the error text on failure."""
+    env = dict(os.environ, NL_RAW_DIR=str(raw_dir), NL_DB_PATH=str(db_path),
+               NL_METRICS_FILE=str(Path(db_path).with_suffix(".metrics.jsonl")),
+               **{f"NL_{k.upper()}": str(v) for k, v in paths.items()})
+    run = subprocess.run([sys.executable, str(ROOT_DIR / script), *args],
+                         cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    return None if run.returncode == 0 else run.stderr.strip().splitlines()[-1:]
+
+
+def _build(raw_dir, db_path, *args):
+    return _run("create_nl_db.py", raw_dir, db_path, *args)
+
+
+def _edit_season(raw_dir, year):
+    """Add 10 to *year*'s Home Runs leader in *raw_dir*; the new value, or None."""
+    table = Path(raw_dir) / f"{year}_Table_1.csv"
+    if not table.exists():
+        return None
+    edited = []
+
+    def bump(m):
+        edited.append(int(m[2]) + 10)
+        return m[1] + str(edited[0])
+
+    text = SEASON_EDIT.sub(bump, table.read_text(encoding="utf-8"), count=1)
+    if not edited:
+        return None
+    table.write_text(text, encoding="utf-8")
+    logging.info("edited %s: Home Runs leader +10 → %s", table.name, edited[0])
+    return edited[0]
+
+
+def _tables(db_path):
+    """table → sorted rows, for every table but the per-build bookkeeping."""
+    conn = sqlite3.connect(db_path)
+    try:
+        names = [n for n, in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT IN ('table_versions', 'db_build')")]
+        return {n: sorted(conn.execute(f'SELECT * FROM "{n}"'), key=repr) for n in names}
+    finally:
+        conn.close()
+
+
+def check_season(conn, args):
+    year = args.year
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        raw = shutil.copytree(nl_config.path("raw_dir"), tmp / "raw")
+        if err := _build(raw, tmp / "season.db", "--stream"):
+            return [f"full load failed: {err}"]
+        if _edit_season(raw, year) is None:
+            return [f"no Home Runs leader to edit in {year}_Table_1.csv"]
+
+        if err := _build(raw, tmp / "season.db", "--season", str(year)):
+            return [f"--season {year} failed: {err}"]
+        if err := _build(raw, tmp / "full.db", "--stream"):
+            return [f"full rebuild failed: {err}"]
+        season, full = _tables(tmp / "season.db"), _tables(tmp / "full.db")
+
+    failures = [f"table {t} only in the {'--season' if t in season else 'full'} DB"
+                for t in sorted(season.keys() ^ full.keys())]
+    for t in sorted(season.keys() & full.keys()):
+        if season[t] != full[t]:
+            diff = len(set(season[t]) ^ set(full[t]))
+            failures.append(f"{t}: --season {year} differs from a full rebuild "
+                            f"({len(season[t])} vs {len(full[t])} rows, {diff} not in both)")
+    logging.info("compared %s tables after --season %s", len(season.keys() & full.keys()), year)
+    return failures
+
+
+def check_export(conn, args):
+    year = args.year
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        raw = shutil.copytree(nl_config.path("raw_dir"), tmp / "raw")
+        db, out = tmp / "export.db", tmp / "export"
+        if err := _build(raw, db, "--stream") or _run(EXPORT_SCRIPT, raw, db, export_dir=out):
+            return [f"first load / export failed: {err}"]
+
+        # rebuild into a new file: its table versions restart at 1, like the first one's
+        value = _edit_season(raw, year)
+        if value is None:
+            return [f"no Home Runs leader to edit in {year}_Table_1.csv"]
+        db.unlink()
+        if err := _build(raw, db, "--stream") or _run(EXPORT_SCRIPT, raw, db, export_dir=out):
+            return [f"rebuild / re-export failed: {err}"]
+
+        with open(next(out.glob("1_*.csv")), newline="", encoding="utf-8") as f:
+            exported = [float(r["#"]) for r in csv.DictReader(f)
+                        if r["Year"] == str(year) and r["Statistic"] == "Home Runs"]
+    if exported[:1] != [value]:
+        return [f"export after a rebuild has {year} Home Runs {exported[:1]}, "
+                f"the DB has {value} (stale CSV kept)"]
+    return []
+
+
+CHECKS = {"era": check_era, "season": check_season, "export": check_export}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consistency checks for the NL DB")
+    parser.add_argument("checks", nargs="*", metavar="CHECK",
+                        help=f"Checks to run: {', '.join(CHECKS)} (default all)")
+    parser.add_argument("--year", type=int, default=SEASON_YEAR,
+                        help=f"Season the season / export checks edit (default {SEASON_YEAR})")
+    args = parser.parse_args()
+    for name in args.checks:
+        if name not in CHECKS:
+            parser.error(f"unknown check {name!r} (choose from {', '.join(CHECKS)})")
+
+    if not DB_PATH.exists():
+        sys.exit(f"❌ Database {DB_PATH} not found. Run create_nl_db.py first.")
+    conn = sqlite3.connect(DB_PATH)
+    failed = False
+    try:
+        for name in args.checks or CHECKS:
+            try:
+                failures = CHECKS[name](conn, args)
+            except sqlite3.Error as e:          # e.g. a DB built before era_stats existed
+                failures = [f"{e} (rebuild with create_nl_db.py)"]
+            for f in failures:
+                logging.error("❌ %s: %s", name, f)
+            if not failures:
+                logging.info("✅ %s: ok", name)
+            failed |= bool(failures)
+    finally:
+        conn.close()
+    sys.exit(1 if failed else 0)
@@ -1,43 +1,251 @@
+import argparse
+import csv
 import sqlite3
-import pandas as pd
 import logging
+from collections import Counter
 from pathlib import Path
 
+import nl_careers, nl_config, nl_db, nl_era, nl_metrics, nl_parse, nl_records, nl_similar
+
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s  %(levelname)s  %(message)s")
 
-# Correct folder and DB path for your project
-CLEAN_DIR = Path("3.National_League_Cleaned")
-DB_PATH = "5.national_league.db"
+# Folder and DB path come from nl_pipeline.json (see nl_config.py)
+RAW_DIR = nl_config.path("raw_dir")
+CLEAN_DIR = nl_config.path("clean_dir")
+DB_PATH = nl_config.path("db_path")
+BATCH_SIZE = 5000   # rows per executemany in --stream mode
 
-if not CLEAN_DIR.exists():
-    logging.error("Folder %s not found. Check your folder path.", CLEAN_DIR)
-    raise SystemExit(1)
+# Tables computed from the loaded ones; each module has TABLES (what it writes),
+# INPUTS (what it reads) and refresh(conn, years, tables)
+DERIVED = [nl_era, nl_careers, nl_records, nl_similar]     # in dependency order
 
-conn = sqlite3.connect(DB_PATH)
-logging.info("Opened SQLite DB: %s", DB_PATH)
 
-for csv_file in CLEAN_DIR.glob("*v2*.csv"):
-    # Remove 'v2' from table name to match Streamlit expectations
-    table_name = csv_file.stem.replace("v2", "")
-    logging.info("Importing %s → table %s", csv_file.name, table_name)
+def replace_table(conn, table, types):
+    """DROP + CREATE *table* with {column: SQLite type}; call inside a transaction."""
+    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.execute(f'CREATE TABLE "{table}" (' +
+                 ", ".join(f'"{c}" {t}' for c, t in types.items()) + ")")
+
+
+def load_csvs(conn, m):
+    """
+    Default path: read the tidy v2 CSVs with pandas and replace each table.
+    A table that fails is logged and the rest still load, then the run exits
+    1 (a failed table must not be recorded as a successful load).
+    """
+    import pandas as pd
+
+    failed = []
+    for table_name in nl_config.TABLES:
+        csv_file = nl_config.table_csv(table_name)
+        logging.info("Importing %s → table %s", csv_file.name, table_name)
+
+        try:
+            with m.file(csv_file):
+                df = pd.read_csv(csv_file)
+                m.read(csv_file, rows=len(df))
+
+                # Build dtype map for proper storage
+                dtype_map = {
+                    col: "INTEGER" for col in df.columns if df[col].dtype.kind in "iu"
+                }
+                dtype_map.update({
+                    col: "REAL" for col in df.columns if df[col].dtype.kind == "f"
+                })
+
+                # not df.to_sql: it commits on its own, before the version bump
+                types = {col: dtype_map.get(col, "TEXT") for col in df.columns}
+                rows = df.astype(object).where(df.notna(), None).itertuples(index=False,
+                                                                             name=None)
+                cols = ", ".join(f'"{c}"' for c in types)
+                marks = ", ".join("?" * len(types))
+                with conn:                           # replace + version bump, one commit
+                    conn.execute("BEGIN")
+                    replace_table(conn, table_name, types)
+                    conn.executemany(f'INSERT INTO "{table_name}" ({cols}) VALUES ({marks})',
+                                     rows)
+                    nl_db.bump_versions(conn, [table_name])
+                m.wrote(rows=len(df), nbytes=0)
+            logging.info("✓ %s rows imported into %s", len(df), table_name)
+
+        except Exception as e:
+            logging.error("🚨 Failed on %s: %s", csv_file.name, e)
+            failed.append(table_name)
+
+    if failed:
+        logging.error("🚨 %s not loaded — fix the CSVs and rerun", ", ".join(failed))
+        raise SystemExit(1)
+
+
+def load_stream(conn, m, csv_dir=None, batch_size=BATCH_SIZE):
+    """
+    --stream path: raw tables → nl_parse generators → batched inserts, all in
+    one transaction.  Only one raw file and one batch per table are in memory
+    at a time.  With *csv_dir* the typed rows are also written as v2 CSVs.
+    """
+    columns = {t: list(cols) for t, cols in nl_parse.SCHEMA.items()}
+    batches = {t: [] for t in columns}
+    counts  = dict.fromkeys(columns, 0)
+    writers, handles = {}, []
+
+    def flush(table):
+        cols = ", ".join(f'"{c}"' for c in columns[table])
+        marks = ", ".join("?" * len(columns[table]))
+        conn.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', batches[table])
+        counts[table] += len(batches[table])
+        batches[table].clear()
 
     try:
-        df = pd.read_csv(csv_file)
+        if csv_dir is not None:
+            Path(csv_dir).mkdir(parents=True, exist_ok=True)
+            for table, cols in columns.items():
+                f = open(Path(csv_dir) / nl_config.TABLES[table], "w",
+                         newline="", encoding="utf-8")
+                handles.append(f)
+                writers[table] = csv.writer(f)
+                writers[table].writerow(cols)
+
+        with conn:                                   # one transaction
+            # sqlite3 only opens a transaction implicitly before DML: BEGIN here so
+            # readers never see a dropped or empty table mid-load
+            conn.execute("BEGIN")
+            for table, types in nl_parse.SCHEMA.items():
+                replace_table(conn, table, types)
+
+            for path in nl_parse.raw_files(RAW_DIR):
+                with m.file(path):
+                    lines = nl_parse.read_lines(path)
+                    m.read(path, rows=len(lines))
+                    for table, record in nl_parse.typed(nl_parse.parse_file(path, lines)):
+                        row = tuple(record[c] for c in columns[table])
+                        batches[table].append(row)
+                        if table in writers:
+                            writers[table].writerow(["" if v is None else v for v in row])
+                        if len(batches[table]) >= batch_size:
+                            flush(table)
+            for table in columns:
+                flush(table)
+            nl_db.bump_versions(conn, columns)
+    finally:
+        for f in handles:
+            f.close()
 
-        # Build dtype map for proper storage
-        dtype_map = {
-            col: "INTEGER" for col in df.columns if df[col].dtype.kind in "iu"
-        }
-        dtype_map.update({
-            col: "REAL" for col in df.columns if df[col].dtype.kind == "f"
-        })
+    for table, n in counts.items():
+        m.wrote(rows=n, nbytes=0)
+        logging.info("✓ %s rows streamed into %s", n, table)
+    if csv_dir is not None:
+        for table in columns:
+            m.wrote(Path(csv_dir) / nl_config.TABLES[table])
+
+
+def create_indexes(conn):
+    """Natural-key indexes; full loads drop the tables, so re-create them after."""
+    for table, key in nl_parse.NATURAL_KEYS.items():
+        cols = ", ".join(f'"{c}"' for c in key)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_key" ON "{table}" ({cols})')
+
+
+def refresh_derived(conn, m, years=None, tables=None):
+    """
+    Recompute the DERIVED tables — only the rows touched by *years* and only
+    modules reading one of the changed *tables*, if given.
+    """
+    for module in DERIVED:
+        if tables is not None and not set(tables) & module.INPUTS:
+            continue
+        n = module.refresh(conn, years, tables)
+        nl_db.bump_versions(conn, module.TABLES)
+        m.wrote(rows=n, nbytes=0)
+        logging.info("✓ %s rows refreshed in %s", n, ", ".join(module.TABLES))
+
+
+def load_season(conn, m, year):
+    """
+    --season path: re-parse one year's raw tables and replace only that
+    season's rows, in one short transaction.  Tables whose rows for the year
+    are unchanged are left alone (no write, no version bump), and the DERIVED
+    tables are refreshed for that year only.  Returns the changed tables.
+    """
+    columns = {t: list(cols) for t, cols in nl_parse.SCHEMA.items()}
+    rows = {t: [] for t in columns}
+    for path in nl_parse.raw_files(RAW_DIR, year):
+        with m.file(path):
+            lines = nl_parse.read_lines(path)
+            m.read(path, rows=len(lines))
+            for table, record in nl_parse.typed(nl_parse.parse_file(path, lines)):
+                rows[table].append(tuple(record[c] for c in columns[table]))
+    if not any(rows.values()):
+        logging.error("No raw tables for %s in %s", year, RAW_DIR)
+        raise SystemExit(1)
+
+    changed = []
+    with conn:                                       # one transaction
+        create_indexes(conn)
+        for table, new in rows.items():
+            cols = ", ".join(f'"{c}"' for c in columns[table])
+            old = conn.execute(f'SELECT {cols} FROM "{table}" WHERE Year = ?',
+                               (year,)).fetchall()
+            if Counter(old) == Counter(new):
+                continue
+            conn.execute(f'DELETE FROM "{table}" WHERE Year = ?', (year,))
+            marks = ", ".join("?" * len(columns[table]))
+            conn.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', new)
+            changed.append(table)
+            m.wrote(rows=len(new), nbytes=0)
+            logging.info("✓ %s: %s rows for %s replaced %s", table, len(new), year, len(old))
+        if changed:
+            nl_db.bump_versions(conn, changed)
+            refresh_derived(conn, m, years={year}, tables=changed)
+    return changed
+
+
+parser = argparse.ArgumentParser(description="Load the NL tables into SQLite")
+parser.add_argument("--stream", action="store_true",
+                    help="Parse the raw tables straight into SQLite (skips the v2 CSVs)")
+parser.add_argument("--csv-out", nargs="?", const=str(CLEAN_DIR), metavar="DIR",
+                    help="With --stream, also write the v2 CSVs (default clean_dir)")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                    help=f"Rows per insert batch with --stream (default {BATCH_SIZE})")
+parser.add_argument("--season", type=int, metavar="YEAR",
+                    help="Only re-ingest one season from the raw tables into an existing DB")
+nl_metrics.add_arguments(parser)
+args = nl_metrics.configure(parser.parse_args())
+
+source = RAW_DIR if args.stream or args.season else CLEAN_DIR
+if not source.exists():
+    logging.error("Folder %s not found. Check your folder path.", source)
+    raise SystemExit(1)
+
+if args.season and not DB_PATH.exists():
+    logging.error("Database %s not found. Run a full load before --season.", DB_PATH)
+    raise SystemExit(1)
+
+conn = sqlite3.connect(DB_PATH, timeout=30)
+conn.execute("PRAGMA journal_mode=WAL")     # readers keep reading while we write
+logging.info("Opened SQLite DB: %s", DB_PATH)
 
-        df.to_sql(table_name, conn, if_exists="replace", index=False, dtype=dtype_map)
-        logging.info("✓ %s rows imported into %s", len(df), table_name)
+stage_name = ("load_season" if args.season else
+              "load_stream" if args.stream else "load")
+with nl_metrics.stage(stage_name) as m:
+    if args.season:
+        changed = load_season(conn, m, args.season)
+        m.extra["changed"] = changed
+        logging.info("Season %s: %s", args.season,
+                     f"updated {', '.join(changed)}" if changed else "no changes")
+    else:
+        if args.stream:
+            load_stream(conn, m, args.csv_out, args.batch_size)
+        else:
+            load_csvs(conn, m)
+        with conn:
+            create_indexes(conn)
+            refresh_derived(conn, m)
+            m.extra["build_id"] = nl_db.new_build(conn)   # versions alone repeat across rebuilds
 
-    except Exception as e:
-        logging.error("🚨 Failed on %s: %s", csv_file.name, e)
+    # fold the WAL back so the .db file itself is complete (pipeline hashes it)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    m.wrote(DB_PATH)          # bytes written = final database size
 
-conn.close()
 logging.info("All tables loaded. You can now query %s", DB_PATH)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+nl_careers.py
+-------------
+Player career rollups, maintained by create_nl_db.py at load time.
+
+Tables
+• player_seasons       the per-player timeline: one row per (player_id, Year,
+                       Source, Statistic) led, WITHOUT ROWID so a player's
+                       whole history is one contiguous primary-key range
+• player_careers       one row per player: id, first / last season, seasons
+                       and titles (stats led), teams in order of appearance
+• player_stat_careers  one row per (player, statistic): times led, career
+                       peak and its season — indexed for career leaderboards
+
+Player ids are stable: a name keeps its player_id across reloads.  The
+leader tables carry nothing but the printed name, so a player is keyed on
+Name alone — two different players with the same name would share one
+career row.
+``refresh(conn, years)`` re-ingests only those seasons and re-aggregates only
+the players who appear in them.
+"""
+
+import numpy as np
+
+from nl_store import SOURCES, lower_is_better, to_number
+
+PLAYER_SOURCES = ["player_hitting", "player_pitching"]
+NOT_PLAYERS = {"To Be Determined"}       # placeholders on the current season page
+TABLES = ["player_careers", "player_seasons", "player_stat_careers"]
+INPUTS = {SOURCES[src] for src in PLAYER_SOURCES}
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS player_careers (
+        player_id  INTEGER PRIMARY KEY,
+        Name       TEXT    NOT NULL UNIQUE,
+        First      INTEGER,
+        Last       INTEGER,
+        Seasons    INTEGER,
+        Titles     INTEGER,
+        Teams      TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS player_seasons (
+        player_id  INTEGER NOT NULL,
+        Year       INTEGER NOT NULL,
+        Source     TEXT    NOT NULL,
+        Statistic  TEXT    NOT NULL,
+        Team       TEXT,
+        Value      REAL,
+        PRIMARY KEY (player_id, Year, Source, Statistic)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS player_stat_careers (
+        player_id  INTEGER NOT NULL,
+        Source     TEXT    NOT NULL,
+        Statistic  TEXT    NOT NULL,
+        Titles     INTEGER NOT NULL,
+        Best       REAL,
+        Best_Year  INTEGER,
+        PRIMARY KEY (player_id, Source, Statistic)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS player_seasons_year ON player_seasons (Year)",
+    """CREATE INDEX IF NOT EXISTS player_stat_careers_titles
+       ON player_stat_careers (Source, Statistic, Titles DESC)""",
+    "CREATE INDEX IF NOT EXISTS player_careers_titles ON player_careers (Titles DESC)",
+]
+
+
+def _marks(values):
+    return ", ".join("?" * len(values))
+
+
+def _source_rows(conn, years=None):
+    """(Name, Year, Source, Statistic, Team, value) from the player leader tables."""
+    where = f"WHERE Year IN ({_marks(years)})" if years is not None else ""
+    rows = []
+    for src in PLAYER_SOURCES:
+        for y, s, name, t, v in conn.execute(
+                f'SELECT Year, Statistic, Name, Team, "#" FROM {SOURCES[src]} {where}',
+                sorted(years or [])):
+            v = to_number(v, s)
+            if y is None or not s or not name or name in NOT_PLAYERS or np.isnan(v):
+                continue                 # tie rows / placeholders carry no value
+            rows.append((name, int(y), src, s, t, v))
+    return rows
+
+
+def _rollup(conn, ids):
+    """Recompute player_careers / player_stat_careers for *ids* from the timeline."""
+    ids = sorted(ids)
+    for i in range(0, len(ids), 500):             # stay under SQLite's variable limit
+        chunk = ids[i:i + 500]
+        conn.execute(f"DELETE FROM player_stat_careers WHERE player_id IN ({_marks(chunk)})",
+                     chunk)
+        timeline = conn.execute(
+            f"""SELECT player_id, Year, Source, Statistic, Team, Value
+                FROM player_seasons WHERE player_id IN ({_marks(chunk)})
+                ORDER BY player_id, Year""", chunk).fetchall()
+
+        careers, stats = {}, {}
+        for pid, y, src, s, t, v in timeline:
+            c = careers.setdefault(pid, {"years": set(), "titles": 0, "teams": []})
+            c["years"].add(y)
+            c["titles"] += 1
+            if t and t not in c["teams"]:
+                c["teams"].append(t)
+            best = stats.get((pid, src, s))
+            if best is None:
+                stats[(pid, src, s)] = [1, v, y]
+            else:
+                best[0] += 1
+                better = v < best[1] if lower_is_better(s) else v > best[1]
+                if better:
+                    best[1:] = [v, y]
+
+        conn.executemany(
+            "UPDATE player_careers SET First=?, Last=?, Seasons=?, Titles=?, Teams=? "
+            "WHERE player_id=?",
+            [(min(c["years"]), max(c["years"]), len(c["years"]), c["titles"],
+              ", ".join(c["teams"]), pid) for pid, c in careers.items()])
+        conn.executemany(
+            "INSERT INTO player_stat_careers VALUES (?, ?, ?, ?, ?, ?)",
+            [(pid, src, s, *best) for (pid, src, s), best in stats.items()])
+        gone = [pid for pid in chunk if pid not in careers]
+        conn.executemany("DELETE FROM player_careers WHERE player_id=?", [(p,) for p in gone])
+
+
+def refresh(conn, years=None, tables=None):
+    """
+    Rebuild the career tables (years=None) or re-ingest only *years*.
+    Call inside the load transaction; returns the number of timeline rows written.
+    """
+    for ddl in DDL:
+        conn.execute(ddl)
+
+    rows = _source_rows(conn, years)
+    if years is None:
+        affected = {pid for (pid,) in conn.execute("SELECT player_id FROM player_careers")}
+        conn.execute("DELETE FROM player_seasons")
+    else:
+        years = sorted(years)
+        affected = {pid for (pid,) in conn.execute(
+            f"SELECT DISTINCT player_id FROM player_seasons WHERE Year IN ({_marks(years)})",
+            years)}
+        conn.execute(f"DELETE FROM player_seasons WHERE Year IN ({_marks(years)})", years)
+
+    # ids: existing names keep theirs, new names get the next one
+    conn.executemany("INSERT OR IGNORE INTO player_careers (Name) VALUES (?)",
+                     [(name,) for name in dict.fromkeys(r[0] for r in rows)])
+    ids = dict(conn.execute("SELECT Name, player_id FROM player_careers"))
+    conn.executemany("INSERT OR REPLACE INTO player_seasons VALUES (?, ?, ?, ?, ?, ?)",
+                     [(ids[name], *rest) for name, *rest in rows])
+
+    _rollup(conn, affected | {ids[r[0]] for r in rows})
+    return len(rows)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+nl_config.py
+------------
+One place for every path the National-League pipeline touches.
+
+Paths come from (later wins):
+  1. the defaults below
+  2. nl_pipeline.json next to this file   (or the file named by NL_CONFIG)
+  3. NL_<KEY> environment variables        e.g. NL_DB_PATH=/tmp/test.db
+
+Relative paths are resolved against the directory of the config file, so the
+scripts behave the same whatever the current working directory is.
+"""
+
+import json, os
+from pathlib import Path
+
+ROOT_DIR    = Path(__file__).resolve().parent
+CONFIG_FILE = Path(os.environ.get("NL_CONFIG", ROOT_DIR / "nl_pipeline.json"))
+
+DEFAULTS = {
+    "raw_dir":    "2.National_League",                  # scraper output
+    "clean_dir":  "3.National_League_Cleaned",          # tidy v2 CSVs
+    "db_path":    "5.Streamlit/5.national_league.db",   # dashboard DB
+    "export_dir": "3.National_League_Cleaned/National_League_final_data",
+    "state_file": ".pipeline_state.json",               # run_pipeline.py cache
+}
+
+# table name → tidy CSV written by clean_all_nl_v2.py
+TABLES = {
+    "player_hitting_leaders":  "player_hitting_leadersv2.csv",
+    "player_pitching_leaders": "player_pitching_leadersv2.csv",
+    "team_standings":          "team_standingsv2.csv",
+    "team_hitting_leaders":    "team_hitting_leadersv2.csv",
+    "team_pitching_leaders":   "team_pitching_leadersv2.csv",
+}
+
+
+def load(config_file: Path = CONFIG_FILE) -> dict:
+    """Return {key: absolute Path} after applying file + env overrides."""
+    config_file = Path(config_file)
+    values = dict(DEFAULTS)
+    if config_file.exists():
+        values.update(json.loads(config_file.read_text(encoding="utf-8")))
+    base = config_file.resolve().parent
+    paths = {}
+    for key, value in values.items():
+        value = os.environ.get(f"NL_{key.upper()}", value)
+        p = Path(value).expanduser()
+        paths[key] = p if p.is_absolute() else base / p
+    return paths
+
+
+PATHS = load()
+
+
+def path(key: str) -> Path:
+    """Configured path for *key* (raw_dir, clean_dir, db_path, …)."""
+    return PATHS[key]
+
+
+def table_csv(table: str) -> Path:
+    """Tidy CSV for one logical table inside clean_dir."""
+    return PATHS["clean_dir"] / TABLES[table]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+nl_db.py
+--------
+Small SQLite helpers shared by the loader, the exporter and the readers.
+
+Change tracking:  every time create_nl_db.py (re)writes a table it bumps that
+table's row in ``table_versions`` and the database-wide ``PRAGMA user_version``.
+Consumers compare those numbers instead of re-reading data to decide whether
+anything changed since they last looked.
+
+Versions restart at 1 when the DB file is recreated (or NL_DB_PATH points at
+another one), so every full load also writes a fresh ``build_id``
+(``db_build`` table); consumers key on the build id *and* the versions.
+"""
+
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name  TEXT PRIMARY KEY,
+    version     INTEGER NOT NULL,
+    updated_at  TEXT    NOT NULL
+)
+"""
+
+BUILD_DDL = """
+CREATE TABLE IF NOT EXISTS db_build (
+    build_id  TEXT NOT NULL,
+    built_at  TEXT NOT NULL
+)
+"""
+
+
+def connect_ro(db_path, timeout: float = 30) -> sqlite3.Connection:
+    """Read-only connection (safe to open many in parallel)."""
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+
+
+def bump_versions(conn: sqlite3.Connection, tables):
+    """Mark *tables* as changed; call inside the transaction that changed them."""
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    conn.execute(VERSIONS_DDL)
+    conn.executemany(
+        """INSERT INTO table_versions (table_name, version, updated_at)
+           VALUES (?, 1, ?)
+           ON CONFLICT(table_name) DO UPDATE
+           SET version = version + 1, updated_at = excluded.updated_at""",
+        [(t, now) for t in tables])
+    db_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.execute(f"PRAGMA user_version = {db_version + 1}")
+
+
+def table_versions(conn: sqlite3.Connection, tables=None) -> dict:
+    """{table: version}; tables never stamped are missing from the result."""
+    try:
+        rows = conn.execute("SELECT table_name, version FROM table_versions").fetchall()
+    except sqlite3.OperationalError:          # DB built before change tracking
+        return {}
+    versions = dict(rows)
+    return versions if tables is None else {t: versions[t] for t in tables if t in versions}
+
+
+def db_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def new_build(conn: sqlite3.Connection) -> str:
+    """Stamp a fresh build id; call inside the transaction of every full load."""
+    build = uuid.uuid4().hex
+    conn.execute(BUILD_DDL)
+    conn.execute("DELETE FROM db_build")
+    conn.execute("INSERT INTO db_build VALUES (?, ?)",
+                 (build, datetime.now(timezone.utc).isoformat(timespec="seconds")))
+    return build
+
+
+def build_id(conn: sqlite3.Connection):
+    """The id of the full load that built this DB; None if it predates build ids."""
+    try:
+        row = conn.execute("SELECT build_id FROM db_build").fetchone()
+    except sqlite3.OperationalError:          # DB built before build ids
+        return None
+    return row[0] if row else None
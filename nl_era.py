@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+nl_era.py
+---------
+Era-normalized statistics, materialized into the ``era_stats`` table by
+create_nl_db.py so readers never normalize at query time.
+
+For every leader row (four leader tables) and every team's Wins / Win % in
+team_standings:
+
+  Z      z-score against its reference group, signed so that higher is always
+         better (ERA and the 'Fewest …' stats are flipped)
+  Pct    percentile rank inside the reference group (0–100, higher = better)
+  Ratio  value / group mean (mean / value for lower-is-better stats)
+
+Reference group
+• leader tables hold only the league leader of each season, so a season on
+  its own is one number.  Leaders are compared with the leaders of the same
+  statistic over a centred window of ±ERA_WINDOW seasons.
+• standings have every club, so Wins / Win % are normalized within the season.
+
+Values OUTLIER_FACTOR× above or below the median of their reference group
+(a unit slip in the raw data, e.g. Total Bases '.228') are left out of every
+group and get NULL Z / Pct / Ratio, so one bad row cannot flatten twenty
+seasons around it; check_nl_db.py era reports them.
+
+``refresh(conn, years, tables)`` recomputes only the rows whose reference
+group touches *years*, and only for the changed source *tables*; with
+years=None the whole table is rebuilt.
+"""
+
+import logging
+from math import fsum
+
+import numpy as np
+
+from nl_store import SOURCES, lower_is_better, to_number
+
+TABLE = "era_stats"
+TABLES = [TABLE]
+INPUTS = {*SOURCES.values(), "team_standings"}
+ERA_WINDOW = 10          # ± seasons a leader is compared against
+MIN_GROUP = 3            # fewer values than this → Z / Pct left NULL
+OUTLIER_FACTOR = 10      # × off the group median → unit error, not normalized
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    Source     TEXT    NOT NULL,
+    Statistic  TEXT    NOT NULL,
+    Year       INTEGER NOT NULL,
+    Name       TEXT,
+    Team       TEXT,
+    Value      REAL    NOT NULL,
+    Z          REAL,
+    Pct        REAL,
+    Ratio      REAL
+)
+"""
+INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_stat_z ON {TABLE} (Source, Statistic, Z DESC)",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_year ON {TABLE} (Year)",
+]
+COLUMNS = ["Source", "Statistic", "Year", "Name", "Team", "Value", "Z", "Pct", "Ratio"]
+
+
+def normalize(years, values, lower=False, window=ERA_WINDOW):
+    """
+    Z, Pct, Ratio for one statistic.  Row i is compared with every row j where
+    |year_i - year_j| <= window — one broadcast (n × n) pass, n ≤ a few hundred.
+    Group sums use math.fsum (exactly rounded), so a --season refresh over a
+    slice of the years gives bit-identical results to a full rebuild.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    score = -np.asarray(values, dtype=np.float64) if lower else \
+        np.asarray(values, dtype=np.float64)
+
+    group = np.abs(years[:, None] - years[None, :]) <= window
+    n = group.sum(axis=1)
+    mean = np.array([fsum(score[g]) for g in group]) / np.maximum(n, 1)
+    var = np.array([fsum((score[g] - m) ** 2) for g, m in zip(group, mean)]) / np.maximum(n, 1)
+    std = np.sqrt(var)
+
+    below = (group & (score[None, :] < score[:, None])).sum(axis=1)
+    equal = (group & (score[None, :] == score[:, None])).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where((n >= MIN_GROUP) & (std > 0), (score - mean) / std, np.nan)
+        pct = np.where(n >= MIN_GROUP, 100 * (below + 0.5 * (equal - 1)) / (n - 1), np.nan)
+        ratio = score / mean if not lower else mean / score   # (−m)/(−v) = m/v
+    ratio = np.where(np.isfinite(ratio), ratio, np.nan)
+    return np.round(z, 4), np.round(pct, 2), np.round(ratio, 4)
+
+
+def outliers(years, values, window=ERA_WINDOW):
+    """
+    Mask of values OUTLIER_FACTOR× above or below the median of the *other*
+    values within ±window seasons (groups of fewer than MIN_GROUP never flag).
+    """
+    years = np.asarray(years, dtype=np.int64)
+    values = np.abs(np.asarray(values, dtype=np.float64))
+    group = np.abs(years[:, None] - years[None, :]) <= window
+    np.fill_diagonal(group, False)
+    enough = group.sum(axis=1) >= MIN_GROUP - 1
+    median = np.full(len(values), np.nan)
+    if enough.any():
+        median[enough] = np.nanmedian(np.where(group, values[None, :], np.nan)[enough], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        off = np.maximum(values / median, median / values)
+    return enough & (median > 0) & ~(off < OUTLIER_FACTOR)
+
+
+def _leader_rows(conn, years=None, sources=SOURCES):
+    """(source, stat) → list of (Year, Name, Team, value) for the given years."""
+    where, params = "", []
+    if years is not None:
+        where = f"WHERE Year IN ({', '.join('?' * len(years))})"
+        params = sorted(years)
+    groups = {}
+    for src in sources:
+        table = SOURCES[src]
+        name = "Name" if src.startswith("player") else "NULL"
+        for y, s, who, t, v in conn.execute(
+                f'SELECT Year, Statistic, {name}, Team, "#" FROM {table} {where}', params):
+            v = to_number(v, s)
+            if y is not None and s and not np.isnan(v):
+                groups.setdefault((src, s), []).append((int(y), who, t, v))
+    return groups
+
+
+def _standings_rows(conn, years=None):
+    where, params = "", []
+    if years is not None:
+        where = f"AND Year IN ({', '.join('?' * len(years))})"
+        params = sorted(years)
+    groups = {}
+    for y, t, w, l in conn.execute(
+            f"SELECT Year, Team, Wins, Losses FROM team_standings "
+            f"WHERE Wins IS NOT NULL AND Losses IS NOT NULL {where}", params):
+        w, l = to_number(w), to_number(l)
+        groups.setdefault(("team_standings", "Wins"), []).append((int(y), None, t, w))
+        if w + l > 0:
+            groups.setdefault(("team_standings", "Win %"), []).append(
+                (int(y), None, t, round(w / (w + l), 3)))
+    return groups
+
+
+def _compute(groups, window, keep_years=None):
+    out = []
+    for (src, stat), rows in groups.items():
+        years = np.array([r[0] for r in rows])
+        values = np.array([r[3] for r in rows], dtype=np.float64)
+        bad = outliers(years, values, window)
+        z, pct, ratio = (np.full(len(rows), np.nan) for _ in range(3))
+        z[~bad], pct[~bad], ratio[~bad] = normalize(years[~bad], values[~bad],
+                                                    lower_is_better(stat), window)
+        for i, (y, who, t, v) in enumerate(rows):
+            if keep_years is None or y in keep_years:
+                if bad[i]:
+                    logging.warning("⚠️  %s %s %s %s: %s is an outlier, not normalized",
+                                    src, stat, y, who or t, v)
+                out.append((src, stat, y, who, t, v,
+                            *(None if np.isnan(x) else float(x)
+                              for x in (z[i], pct[i], ratio[i]))))
+    return out
+
+
+def refresh(conn, years=None, tables=None):
+    """
+    Rebuild era_stats (years=None) or only the rows affected by *years* in
+    the changed *tables* (default: all of INPUTS).
+    Call inside the load transaction; returns the number of rows written.
+    """
+    conn.execute(DDL)
+    for ddl in INDEXES:
+        conn.execute(ddl)
+
+    if years is None:
+        conn.execute(f"DELETE FROM {TABLE}")
+        rows = _compute(_leader_rows(conn), ERA_WINDOW) + \
+            _compute(_standings_rows(conn), 0)
+    else:
+        years = set(years)
+        tables = INPUTS if tables is None else set(tables)
+        sources = [src for src, table in SOURCES.items() if table in tables]
+        rows = []
+        if sources:
+            # every season within ±window of a changed one; their groups reach
+            # ±2·window, and the outlier test of those group members ±3·window
+            hit = {y + d for y in years for d in range(-ERA_WINDOW, ERA_WINDOW + 1)}
+            ctx = {y + d for y in years for d in range(-3 * ERA_WINDOW, 3 * ERA_WINDOW + 1)}
+            rows += _compute(_leader_rows(conn, ctx, sources), ERA_WINDOW, hit)
+            conn.execute(f"DELETE FROM {TABLE} WHERE Source IN ({', '.join('?' * len(sources))}) "
+                         f"AND Year IN ({', '.join('?' * len(hit))})", sources + sorted(hit))
+        if "team_standings" in tables:
+            rows += _compute(_standings_rows(conn, years), 0)
+            conn.execute(f"DELETE FROM {TABLE} WHERE Source = 'team_standings' "
+                         f"AND Year IN ({', '.join('?' * len(years))})", sorted(years))
+
+    conn.executemany(f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    return len(rows)
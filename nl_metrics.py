@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+nl_metrics.py
+-------------
+Shared stage instrumentation for the National-League pipeline scripts.
+
+Every script wraps its work in ``stage("<name>")``.  When the block exits the
+stage emits ONE structured JSON record:
+
+  • wall / CPU seconds
+  • rows in / rows out, bytes read / bytes written
+  • peak RSS of the process (and peak traced heap in profile mode)
+  • per-file timings
+
+Records are logged and appended to ``metrics/stage_metrics.jsonl`` so nightly
+runs can be compared over time.
+
+Opt-in profiling:  pass ``--profile`` (or set NL_PROFILE=1) and each stage also
+writes a cProfile dump plus a tracemalloc snapshot into ``metrics/profiles/``.
+
+Environment overrides
+• NL_METRICS_FILE   where to append JSON records ("" disables the file)
+• NL_PROFILE        "1" turns profiling on
+• NL_RUN_ID         shared id so every script of one run groups together
+"""
+
+import argparse, cProfile, json, logging, os, sys, time, tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:                     # not available on Windows
+    import resource
+except ImportError:
+    resource = None
+
+ROOT_DIR       = Path(__file__).resolve().parent
+METRICS_DIR    = ROOT_DIR / "metrics"
+METRICS_FILE   = os.environ.get("NL_METRICS_FILE",
+                                str(METRICS_DIR / "stage_metrics.jsonl"))
+PROFILE_DIR    = METRICS_DIR / "profiles"
+PROFILE        = os.environ.get("NL_PROFILE", "") == "1"
+RUN_ID         = os.environ.get("NL_RUN_ID",
+                                datetime.now().strftime("%Y%m%dT%H%M%S"))
+TOP_ALLOCS     = 25      # lines kept in the tracemalloc text summary
+SLOWEST_FILES  = 5       # per-file timings echoed to the log (file gets all)
+
+log = logging.getLogger("nl_metrics")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add --profile / --metrics-file to a script that has its own argparse."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Capture cProfile + tracemalloc snapshots per stage")
+    parser.add_argument("--metrics-file",
+                        help="Append JSON stage metrics here "
+                             f"(default {METRICS_FILE})")
+
+
+def configure(args=None):
+    """
+    Apply the instrumentation flags.
+
+    Scripts without their own argparse call ``configure()`` and the flags are
+    picked out of sys.argv (anything else is left alone); scripts with a parser
+    call ``add_arguments(parser)`` first and then ``configure(args)``.
+    """
+    global PROFILE, METRICS_FILE
+    if args is None:
+        parser = argparse.ArgumentParser(add_help=False)
+        add_arguments(parser)
+        args, rest = parser.parse_known_args()
+        sys.argv[1:] = rest
+    PROFILE = PROFILE or bool(getattr(args, "profile", False))
+    if getattr(args, "metrics_file", None):
+        METRICS_FILE = args.metrics_file
+    return args
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _size(path):
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+
+class StageMetrics:
+    """Counters for one stage; filled in by the script, emitted by stage()."""
+
+    def __init__(self, name: str):
+        self.name          = name
+        self.rows_in       = 0
+        self.rows_out      = 0
+        self.bytes_read    = 0
+        self.bytes_written = 0
+        self.files         = {}      # file name → seconds spent on it
+        self.extra         = {}      # free-form, stage-specific numbers
+
+    def read(self, path=None, rows=0, nbytes=None):
+        """Record input consumed; bytes default to the size of *path*."""
+        self.rows_in    += rows
+        self.bytes_read += nbytes if nbytes is not None else (_size(path) if path else 0)
+
+    def wrote(self, path=None, rows=0, nbytes=None):
+        """Record output produced; call after the file is closed."""
+        self.rows_out      += rows
+        self.bytes_written += nbytes if nbytes is not None else (_size(path) if path else 0)
+
+    @contextmanager
+    def file(self, path):
+        """Time the work done on one file (accumulates if seen twice)."""
+        key = Path(path).name
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.files[key] = self.files.get(key, 0.0) + time.perf_counter() - t0
+
+
+def _emit(record: dict):
+    line = json.dumps(record, default=str)
+    files = record["files"]
+    brief = dict(record, files=len(files), slowest_files=dict(
+        sorted(files.items(), key=lambda kv: kv[1], reverse=True)[:SLOWEST_FILES]))
+    log.info("METRICS %s", json.dumps(brief, default=str))
+    if not METRICS_FILE:
+        return
+    try:
+        Path(METRICS_FILE).parent.mkdir(parents=True, exist_ok=True)
+        with open(METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        log.warning("Could not write metrics to %s: %s", METRICS_FILE, e)
+
+
+def _write_profile(name, profiler, snapshot):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = PROFILE_DIR / f"{RUN_ID}_{name}"
+    profiler.dump_stats(f"{stem}.prof")
+    snapshot.dump(f"{stem}.tracemalloc")
+    with open(f"{stem}_tracemalloc.txt", "w", encoding="utf-8") as f:
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCS]:
+            f.write(f"{stat}\n")
+    return str(stem)
+
+
+@contextmanager
+def stage(name: str, profile: bool = None):
+    """
+    Instrument one pipeline stage::
+
+        with nl_metrics.stage("load") as m:
+            m.read(csv_path, rows=len(df))
+            ...
+
+    The JSON record is emitted even if the block raises (status "error").
+    """
+    profile = PROFILE if profile is None else profile
+    m = StageMetrics(name)
+    profiler = None
+    if profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    status = "ok"
+    try:
+        yield m
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        record = {
+            "run_id":        RUN_ID,
+            "stage":         name,
+            "script":        Path(sys.argv[0]).name,
+            "timestamp":     datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "status":        status,
+            "wall_s":        round(wall, 4),
+            "cpu_s":         round(cpu, 4),
+            "rows_in":       m.rows_in,
+            "rows_out":      m.rows_out,
+            "bytes_read":    m.bytes_read,
+            "bytes_written": m.bytes_written,
+            "peak_rss_mb":   _peak_rss_mb(),
+            "files":         {k: round(v, 4) for k, v in m.files.items()},
+        }
+        if m.extra:
+            record["extra"] = m.extra
+        if profiler is not None:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            record["peak_traced_mb"] = round(
+                tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            tracemalloc.stop()
+            record["profile"] = _write_profile(name, profiler, snapshot)
+        _emit(record)
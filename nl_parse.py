@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+nl_parse.py
+-----------
+Generator-based parser for the raw scraper tables (<raw_dir>/YYYY_Table_N.csv).
+
+Nothing here holds more than one raw file in memory, so the same code backs
+both the CSV path (clean_all_nl_v2.py collects the records into DataFrames)
+and the streaming loader (create_nl_db.py --stream pipes typed records
+straight into batched SQLite inserts).
+
+  parse_file(path)          → (table, record) pairs, raw strings as scraped
+  iter_records(raw_dir)     → the same over every raw file
+  typed(records)            → '#' cleaned to float for the CLEANED tables,
+                              exactly as cleaning_eda.py does it
+  rate_value(stat, value)   → averages / percentages scraped without their
+                              leading dot ('335') read as thousandths ('.335')
+"""
+
+import csv, re
+from pathlib import Path
+
+# raw table number → (logical table, columns)
+TABLE_NO = {
+    "1": ("player_hitting_leaders",  ["Year", "Statistic", "Name", "Team", "#"]),
+    "2": ("player_pitching_leaders", ["Year", "Statistic", "Name", "Team", "#"]),
+    "3": ("team_standings",          ["Year", "Team", "Wins", "Losses", "Ties",
+                                      "WP", "GB", "Payroll"]),
+    "4": ("team_hitting_leaders",    ["Year", "Statistic", "Team", "#"]),
+    "5": ("team_pitching_leaders",   ["Year", "Statistic", "Team", "#"]),
+}
+COLUMNS = dict(TABLE_NO.values())
+
+# SQLite column types for tables created by the streaming loader
+SCHEMA = {
+    "player_hitting_leaders":  {"Year": "INTEGER", "Statistic": "TEXT", "Name": "TEXT",
+                                "Team": "TEXT", "#": "TEXT"},
+    "player_pitching_leaders": {"Year": "INTEGER", "Statistic": "TEXT", "Name": "TEXT",
+                                "Team": "TEXT", "#": "REAL"},
+    "team_standings":          {"Year": "INTEGER", "Team": "TEXT", "Wins": "INTEGER",
+                                "Losses": "INTEGER", "Ties": "INTEGER", "WP": "TEXT",
+                                "GB": "TEXT", "Payroll": "TEXT"},
+    "team_hitting_leaders":    {"Year": "INTEGER", "Statistic": "TEXT", "Team": "TEXT",
+                                "#": "REAL"},
+    "team_pitching_leaders":   {"Year": "INTEGER", "Statistic": "TEXT", "Team": "TEXT",
+                                "#": "REAL"},
+}
+
+# Natural key of each table: indexed after every load, and the rows a season
+# update replaces are exactly those whose key starts with that Year
+NATURAL_KEYS = {
+    "player_hitting_leaders":  ["Year", "Statistic", "Name"],
+    "player_pitching_leaders": ["Year", "Statistic", "Name"],
+    "team_standings":          ["Year", "Team"],
+    "team_hitting_leaders":    ["Year", "Statistic", "Team"],
+    "team_pitching_leaders":   ["Year", "Statistic", "Team"],
+}
+
+# Tables whose '#' column cleaning_eda.py converts to numbers
+CLEANED = {"player_pitching_leaders", "team_hitting_leaders", "team_pitching_leaders"}
+
+int_pat = re.compile(r"\d+")
+num_pat = re.compile(r"(\d+\.?\d*)")
+junk_pat = re.compile("History|→|←")
+rate_pat = re.compile("Average|Percentage")
+
+
+def to_int(text):
+    m = int_pat.search(str(text))
+    return int(m.group()) if m else None
+
+
+def clean_number(val):
+    """Same rule as cleaning_eda.clean_numeric_column: first number, 3 dp."""
+    if val is None or val == "":
+        return None
+    m = num_pat.search(str(val).replace(",", "").strip())
+    return round(float(m.group(1)), 3) if m else None
+
+
+def rate_value(statistic, value):
+    """
+    Batting / slugging averages and on-base / winning percentages are
+    thousandths, but the dot goes missing: a few raw pages drop it ('335' for
+    .335) and clean_number() drops a leading one ('.750' → 750).  Values above
+    1 of those statistics are divided by 1000; strings stay strings ('.335'),
+    numbers stay numbers, anything else is returned unchanged.
+    """
+    if not statistic or not rate_pat.search(statistic):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value.replace(",", "").strip())
+        except ValueError:
+            return value
+        return f"{number / 1000:.3f}".lstrip("0") if number > 1 else value
+    if isinstance(value, (int, float)) and value > 1:
+        return round(value / 1000, 3)
+    return value
+
+
+def raw_files(raw_dir, year=None):
+    """Raw scraper tables (optionally one season's) in a stable (year, table) order."""
+    return sorted(Path(raw_dir).glob(f"{year or '*'}_Table_*.csv"),
+                  key=lambda p: (p.stem.split("_")[0], p.stem.split("_")[2]))
+
+
+def read_lines(path: Path):
+    """Non-blank lines of one raw file minus captions / navigation junk."""
+    lines = [l.strip() for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+    return [l for l in lines if not junk_pat.search(l)]
+
+
+def parse_lines(year: int, tbl: str, lines):
+    """Yield record dicts for one raw table (the caption row is skipped)."""
+    if tbl == "3":                                  # ── standings table
+        for row in lines[1:]:
+            parts = [p.strip() for p in row.split(",") if p.strip()]
+            if len(parts) < 4 or parts[0] == "Payroll":
+                continue
+            yield {
+                "Year":    year,
+                "Team":    parts[0],
+                "Wins":    to_int(parts[1]),
+                "Losses":  to_int(parts[2]),
+                "Ties":    to_int(parts[3]) if len(parts) > 3 else None,
+                "WP":      parts[4] if len(parts) > 4 else None,
+                "GB":      parts[5] if len(parts) > 5 else None,
+                "Payroll": parts[6] if len(parts) > 6 else None,
+            }
+        return
+
+    cols = TABLE_NO[tbl][1]                         # ── leader tables
+    body = [l.replace("\n", " ").strip() for l in lines[1:]]
+    for r in csv.reader(body):
+        if len(r) < 2 or r[0] == "Statistic":
+            continue
+        r += [""] * 5               # pad to at least 5 elements
+        if tbl in ("1", "2"):       # remove Top-25 column
+            r = r[:4] + [r[3]]      # keep first 4 (Statistic Name Team #)
+        record = {"Year": year}
+        record.update(zip(cols[1:], r[:len(cols) - 1]))
+        yield record
+
+
+def parse_file(path: Path, lines=None):
+    """Yield (table, record) for one raw file; unknown table numbers are skipped."""
+    year, tbl = path.stem.split("_")[0], path.stem.split("_")[2]
+    if tbl not in TABLE_NO:
+        return
+    table = TABLE_NO[tbl][0]
+    for record in parse_lines(int(year), tbl, read_lines(path) if lines is None else lines):
+        yield table, record
+
+
+def iter_records(raw_dir, years=None):
+    """(table, record) for every raw file, optionally limited to *years*."""
+    for path in raw_files(raw_dir):
+        if years is None or int(path.stem.split("_")[0]) in years:
+            yield from parse_file(path)
+
+
+def typed(records):
+    """
+    Records as they would come back from the v2 CSVs after cleaning_eda.py:
+    empty strings become NULL, '#' of the CLEANED tables becomes a float and
+    every leader '#' goes through rate_value().
+    """
+    for table, record in records:
+        for key, value in record.items():
+            if value == "":
+                record[key] = None
+        if table in CLEANED:
+            record["#"] = clean_number(record["#"])
+        if "Statistic" in record:
+            record["#"] = rate_value(record["Statistic"], record["#"])
+        yield table, record
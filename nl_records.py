@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+nl_records.py
+-------------
+Single-season records and leader streaks, maintained by create_nl_db.py at
+load time from the player_seasons timeline (so it runs after nl_careers).
+
+Tables
+• stat_records   one row per (Source, Statistic, Year): that season's leader,
+                 the NL record as of that season and who held it; Broken = 1
+                 where the season set a new record (the first season sets the
+                 first), with the record it broke in Previous / Previous_Name /
+                 Previous_Year
+• leader_streaks every run of two or more consecutive seasons of a statistic
+                 led by the same player (Kind 'player') or by a player of the
+                 same club (Kind 'team')
+• leader_counts  per (statistic, holder): seasons led, first / last, longest streak
+
+Each statistic is one cumulative pass: rows sorted by Year,
+np.maximum.accumulate over the direction-signed values gives the running
+record, and the streaks are run lengths over (holder, season index).
+``refresh(conn, years)`` recomputes only the statistics whose leader changed
+in those seasons.
+"""
+
+from itertools import groupby, repeat
+
+import numpy as np
+
+from nl_careers import PLAYER_SOURCES
+from nl_store import SOURCES, lower_is_better
+
+TABLES = ["stat_records", "leader_streaks", "leader_counts"]
+INPUTS = {SOURCES[src] for src in PLAYER_SOURCES}
+KINDS = ("player", "team")
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS stat_records (
+        Source         TEXT    NOT NULL,
+        Statistic      TEXT    NOT NULL,
+        Year           INTEGER NOT NULL,
+        Name           TEXT,
+        Team           TEXT,
+        Value          REAL,
+        Record         REAL,
+        Record_Name    TEXT,
+        Record_Year    INTEGER,
+        Broken         INTEGER NOT NULL,
+        Previous       REAL,
+        Previous_Name  TEXT,
+        Previous_Year  INTEGER,
+        PRIMARY KEY (Source, Statistic, Year)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS leader_streaks (
+        Source     TEXT    NOT NULL,
+        Statistic  TEXT    NOT NULL,
+        Kind       TEXT    NOT NULL,
+        Holder     TEXT    NOT NULL,
+        Start      INTEGER NOT NULL,
+        End        INTEGER NOT NULL,
+        Length     INTEGER NOT NULL,
+        PRIMARY KEY (Source, Statistic, Kind, Holder, Start)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS leader_counts (
+        Source     TEXT    NOT NULL,
+        Statistic  TEXT    NOT NULL,
+        Kind       TEXT    NOT NULL,
+        Holder     TEXT    NOT NULL,
+        Titles     INTEGER NOT NULL,
+        First      INTEGER NOT NULL,
+        Last       INTEGER NOT NULL,
+        Longest    INTEGER NOT NULL,
+        PRIMARY KEY (Source, Statistic, Kind, Holder)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS leader_streaks_length ON leader_streaks (Kind, Length DESC)",
+    "CREATE INDEX IF NOT EXISTS leader_counts_titles ON leader_counts (Kind, Titles DESC)",
+]
+
+
+def _marks(values):
+    return ", ".join("?" * len(values))
+
+
+def _leaders(conn, stats=None, years=None):
+    """(Source, Statistic, Year, Name, Team, Value) from the timeline, in pass order."""
+    where, params = [], []
+    if stats is not None:
+        where.append(f"p.Statistic IN ({_marks({s for _, s in stats})})")
+        params += sorted({s for _, s in stats})
+    if years is not None:
+        where.append(f"p.Year IN ({_marks(years)})")
+        params += sorted(years)
+    rows = conn.execute(
+        f"""SELECT p.Source, p.Statistic, p.Year, c.Name, p.Team, p.Value
+            FROM player_seasons p JOIN player_careers c USING (player_id)
+            {"WHERE " + " AND ".join(where) if where else ""}""", params).fetchall()
+    if stats is not None:
+        rows = [r for r in rows if (r[0], r[1]) in stats]
+    return sorted(rows)
+
+
+def _records(rows):
+    """stat_records rows: one np.maximum.accumulate pass per statistic."""
+    out = []
+    for (src, stat), group in groupby(rows, key=lambda r: r[:2]):
+        _, _, years, names, teams, values = zip(*group)
+        values = np.array(values, dtype=np.float64)
+
+        signed = -values if lower_is_better(stat) else values
+        best = np.maximum.accumulate(signed)
+        broken = np.r_[True, signed[1:] > best[:-1]]
+        holder = np.maximum.accumulate(np.where(broken, np.arange(len(values)), 0))
+        previous = np.r_[0, holder[:-1]]
+        has_previous = broken & (np.arange(len(values)) > 0)
+
+        names, years = np.array(names, dtype=object), np.array(years)
+        out += zip(repeat(src), repeat(stat), years.tolist(), names, teams, values.tolist(),
+                   values[holder].tolist(), names[holder], years[holder].tolist(),
+                   broken.astype(int).tolist(),
+                   *(np.where(has_previous, col[previous], None).tolist()
+                     for col in (values, names, years)))
+    return out
+
+
+def _streaks(rows):
+    """leader_streaks and leader_counts rows, as run lengths over (holder, season index)."""
+    if not rows:
+        return [], []
+    src, stat, years, names, teams, _ = zip(*rows)
+    src, stat = np.array(src, dtype=object), np.array(stat, dtype=object)
+    years = np.array(years, dtype=np.int64)
+    first = np.array([True] + [a[:2] != b[:2] for a, b in zip(rows[1:], rows)])
+    stat_key = np.cumsum(first) - 1                       # statistic id, in pass order
+    season = np.arange(len(rows)) - np.flatnonzero(first)[stat_key]
+
+    streaks, counts = [], []
+    for kind, holders in zip(KINDS, (names, teams)):
+        holders = np.array([h or "" for h in holders])
+        ok = np.flatnonzero(holders != "")
+        idx = ok[np.lexsort((season[ok], holders[ok], stat_key[ok]))]
+        k, h, s, y = stat_key[idx], holders[idx], season[idx], years[idx]
+
+        new_holder = np.r_[True, (k[1:] != k[:-1]) | (h[1:] != h[:-1])]
+        new_run = new_holder | np.r_[True, s[1:] != s[:-1] + 1]
+        run_start = np.flatnonzero(new_run)
+        run_end = np.r_[run_start[1:], len(idx)] - 1
+        length = run_end - run_start + 1
+        a, b = run_start[length > 1], run_end[length > 1]
+        streaks += zip(src[idx[a]], stat[idx[a]], repeat(kind), h[a].tolist(),
+                       y[a].tolist(), y[b].tolist(), length[length > 1].tolist())
+
+        group = np.cumsum(new_holder) - 1
+        longest = np.zeros(group[-1] + 1, dtype=np.int64)
+        np.maximum.at(longest, group[run_start], length)
+        a = np.flatnonzero(new_holder)
+        b = np.r_[a[1:], len(idx)] - 1
+        counts += zip(src[idx[a]], stat[idx[a]], repeat(kind), h[a].tolist(),
+                      np.bincount(group).tolist(), y[a].tolist(), y[b].tolist(),
+                      longest.tolist())
+    return streaks, counts
+
+
+def _affected(conn, years):
+    """Statistics whose leader (name, team or value) in *years* is not what is stored."""
+    years = sorted(years)
+    stored = {r[:3]: r[3:] for r in conn.execute(
+        f"SELECT Source, Statistic, Year, Name, Team, Value FROM stat_records "
+        f"WHERE Year IN ({_marks(years)})", years)}
+    fresh = {r[:3]: r[3:] for r in _leaders(conn, years=years)}
+    return {key[:2] for key in stored.keys() | fresh.keys()
+            if stored.get(key) != fresh.get(key)}
+
+
+def refresh(conn, years=None, tables=None):
+    """
+    Rebuild the record tables (years=None), or only the statistics whose
+    leader changed in *years*.  Call inside the load transaction, after
+    nl_careers; returns the number of stat_records rows written.
+    """
+    for ddl in DDL:
+        conn.execute(ddl)
+
+    if years is None:
+        stats = None
+        for table in TABLES:
+            conn.execute(f"DELETE FROM {table}")
+    else:
+        stats = _affected(conn, years)
+        if not stats:
+            return 0
+        for table in TABLES:
+            conn.executemany(f"DELETE FROM {table} WHERE Source = ? AND Statistic = ?",
+                             sorted(stats))
+
+    rows = _leaders(conn, stats)
+    records = _records(rows)
+    streaks, counts = _streaks(rows)
+    conn.executemany("INSERT INTO stat_records VALUES "
+                     "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+    conn.executemany("INSERT INTO leader_streaks VALUES (?, ?, ?, ?, ?, ?, ?)", streaks)
+    conn.executemany("INSERT INTO leader_counts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", counts)
+    return len(records)
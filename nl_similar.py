@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""
+nl_similar.py
+-------------
+Similar-season search: one float32 feature vector per (player, season) and
+per (team, season), stored as a matrix BLOB (``season_vectors``) by
+create_nl_db.py and searched with a single vectorised distance computation.
+
+Features (built from era_stats, so every dimension is already era-adjusted)
+• player seasons  one dimension per statistic (hitting + pitching); a season
+                  that led it gets clip(1 + Z/4, 0.5, 2) — "led it" plus how
+                  dominant the lead was for its era — and 0 otherwise
+• team seasons    Win % z-score within the season, plus the same led-stat
+                  dimensions for the team hitting / pitching leader tables
+                  (leader tables say "Cincinnati", standings "Cincinnati Reds":
+                  joined on the unique standings team of that Year with that prefix)
+
+Distance is Euclidean: ||x||² + ||q||² - 2·X·q over the whole matrix.
+
+    index = SeasonIndex.from_db(conn, "team")
+    index.similar("Cincinnati Reds", 1990, k=10)
+"""
+
+import json
+
+import numpy as np
+
+from nl_era import ERA_WINDOW
+
+TABLES = ["season_vectors"]
+INPUTS = {"player_hitting_leaders", "player_pitching_leaders", "team_standings",
+          "team_hitting_leaders", "team_pitching_leaders"}
+KINDS = ("player", "team")
+
+DDL = """
+CREATE TABLE IF NOT EXISTS season_vectors (
+    Kind      TEXT PRIMARY KEY,
+    Features  TEXT    NOT NULL,       -- JSON list, one per column
+    Labels    TEXT    NOT NULL,       -- JSON list of [Name, Team, Year], one per row
+    Rows      INTEGER NOT NULL,
+    Cols      INTEGER NOT NULL,
+    Matrix    BLOB    NOT NULL        -- float32, row-major
+)
+"""
+
+
+def led_weight(z):
+    """Feature value of the statistics a season led (NaN z-scores count as 0)."""
+    return np.clip(1 + np.nan_to_num(np.asarray(z, dtype=np.float64)) / 4, 0.5, 2.0)
+
+
+def _standings_team(teams_by_year, year, team):
+    """'Cincinnati' in 1990 → 'Cincinnati Reds' when exactly one club matches."""
+    matches = [t for t in teams_by_year.get(year, ()) if t.startswith(team)]
+    return matches[0] if len(matches) == 1 else None
+
+
+class _Builder:
+    """Collects (season, feature, value) cells, then fills the matrix in one go."""
+
+    def __init__(self):
+        self.features, self.seasons, self.labels = {}, {}, []
+        self.rows, self.cols, self.values, self.led = [], [], [], []
+
+    def row(self, name, team, year):
+        key = (name, year)
+        if key not in self.seasons:
+            self.seasons[key] = len(self.labels)
+            self.labels.append((name, team, year))
+        return self.seasons[key]
+
+    def add(self, row, feature, value, led=True):
+        """*value* is the era Z; led=False stores it as is instead of led_weight(Z)."""
+        self.rows.append(row)
+        self.cols.append(self.features.setdefault(feature, len(self.features)))
+        self.values.append(np.nan if value is None else value)
+        self.led.append(led)
+
+    def result(self):
+        values = np.asarray(self.values, dtype=np.float64)
+        values = np.where(self.led, led_weight(values), np.nan_to_num(values))
+        matrix = np.zeros((len(self.labels), len(self.features)), dtype=np.float32)
+        matrix[self.rows, self.cols] = values
+        return _sorted(list(self.features), self.labels, matrix)
+
+
+def _sorted(features, labels, matrix):
+    """Rows in (Year, Name) order, so incremental and full builds agree."""
+    order = sorted(range(len(labels)), key=lambda i: (labels[i][2], labels[i][0]))
+    return features, [labels[i] for i in order], matrix[order]
+
+
+def build(conn, years=None):
+    """{kind: (features, labels, matrix)} from era_stats, optionally for *years* only."""
+    where, params = "", []
+    if years is not None:
+        where = f"AND Year IN ({', '.join('?' * len(years))})"
+        params = sorted(years)
+
+    # ── players ─────────────────────────────────────────────────────────
+    players = _Builder()
+    for src, stat, year, name, team, z in conn.execute(
+            f"""SELECT Source, Statistic, Year, Name, Team, Z FROM era_stats
+                WHERE Source IN ('player_hitting', 'player_pitching') {where}""", params):
+        players.add(players.row(name, team, year), f"{src}:{stat}", z)
+
+    # ── teams ───────────────────────────────────────────────────────────
+    teams, teams_by_year = _Builder(), {}
+    for year, team, z in conn.execute(
+            f"""SELECT Year, Team, Z FROM era_stats
+                WHERE Source = 'team_standings' AND Statistic = 'Win %' {where}""", params):
+        teams_by_year.setdefault(year, []).append(team)
+        teams.add(teams.row(team, team, year), "team_standings:Win %", z, led=False)
+    for src, stat, year, team, z in conn.execute(
+            f"""SELECT Source, Statistic, Year, Team, Z FROM era_stats
+                WHERE Source IN ('team_hitting', 'team_pitching') {where}""", params):
+        club = _standings_team(teams_by_year, year, team or "")
+        if club is not None:
+            teams.add(teams.seasons[(club, year)], f"{src}:{stat}", z)
+
+    return {"player": players.result(), "team": teams.result()}
+
+
+def _merge(old, new, years):
+    """Replace the rows of *years* in *old* with *new* (columns are unioned)."""
+    old_features, old_labels, old_matrix = old
+    new_features, new_labels, new_matrix = new
+    features = old_features + [f for f in new_features if f not in old_features]
+    keep = [i for i, label in enumerate(old_labels) if label[2] not in years]
+
+    matrix = np.zeros((len(keep) + len(new_labels), len(features)), dtype=np.float32)
+    matrix[:len(keep), :len(old_features)] = old_matrix[keep]
+    cols = [features.index(f) for f in new_features]
+    matrix[len(keep):, cols] = new_matrix
+    return _sorted(features, [old_labels[i] for i in keep] + new_labels, matrix)
+
+
+def _load(conn, kind):
+    row = conn.execute("SELECT Features, Labels, Rows, Cols, Matrix FROM season_vectors "
+                       "WHERE Kind = ?", (kind,)).fetchone()
+    if row is None:
+        return None
+    features, labels, rows, cols, blob = row
+    matrix = np.frombuffer(blob, dtype=np.float32).reshape(rows, cols)
+    return json.loads(features), [tuple(l) for l in json.loads(labels)], matrix
+
+
+def refresh(conn, years=None, tables=None):
+    """
+    Rebuild both matrices (years=None), or only the seasons whose era_stats
+    the same update re-computed (±ERA_WINDOW around *years*).  Runs after
+    nl_era.  Returns the number of season vectors written.
+    """
+    conn.execute(DDL)
+    if years is None:
+        parts = build(conn)
+    else:
+        window = {y + d for y in years for d in range(-ERA_WINDOW, ERA_WINDOW + 1)}
+        fresh = build(conn, window)
+        parts = {}
+        for kind in KINDS:
+            old = _load(conn, kind)
+            parts[kind] = fresh[kind] if old is None else _merge(old, fresh[kind], window)
+
+    n = 0
+    for kind, (features, labels, matrix) in parts.items():
+        conn.execute("INSERT OR REPLACE INTO season_vectors VALUES (?, ?, ?, ?, ?, ?)",
+                     (kind, json.dumps(features), json.dumps(labels), *matrix.shape,
+                      matrix.tobytes()))
+        n += len(labels)
+    return n
+
+
+class SeasonIndex:
+    """One kind's matrix + labels, loaded once and queried in memory."""
+
+    def __init__(self, kind, features, labels, matrix):
+        self.kind, self.features, self.matrix = kind, features, matrix
+        names, teams, years = zip(*labels) if labels else ((), (), ())
+        self.names = np.array(names, dtype=object)
+        self.teams = np.array(teams, dtype=object)
+        self.years = np.array(years, dtype=np.int16)
+        self.norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    @classmethod
+    def from_db(cls, conn, kind="player"):
+        loaded = _load(conn, kind)
+        if loaded is None:
+            raise KeyError(f"No {kind} vectors; run create_nl_db.py first")
+        return cls(kind, *loaded)
+
+    def find(self, name, year):
+        """Row of (name, year); teams also match a unique case-insensitive substring."""
+        in_year = np.flatnonzero(self.years == year)
+        exact = in_year[self.names[in_year] == name]
+        if len(exact):
+            return int(exact[0])
+        if self.kind == "team":
+            hits = [i for i in in_year if name.lower() in self.names[i].lower()]
+            if len(hits) == 1:
+                return hits[0]
+            if len(hits) > 1:
+                raise KeyError(f"{name!r} matches several {year} teams: "
+                               + ", ".join(self.names[hits]))
+        raise KeyError(f"No {self.kind} season {name!r} {year}")
+
+    def similar(self, name, year, k=10, exclude_same=False):
+        """The *k* nearest seasons to (name, year), nearest first."""
+        q = self.find(name, year)
+        d2 = self.norms + self.norms[q] - 2 * (self.matrix @ self.matrix[q])
+        d2[q] = np.inf
+        if exclude_same:
+            d2[self.names == self.names[q]] = np.inf
+        k = min(k, int(np.isfinite(d2).sum()))
+        top = np.argpartition(d2, k - 1)[:k] if k else np.empty(0, np.int64)
+        top = top[np.argsort(d2[top], kind="stable")]
+        dist = np.sqrt(np.maximum(d2[top], 0))
+        led = np.array([not f.startswith("team_standings") for f in self.features])
+        shared = [", ".join(self.features[c].split(":", 1)[1] for c in np.flatnonzero(
+                      led & (self.matrix[i] > 0) & (self.matrix[q] > 0)))
+                  for i in top]
+        return {"Name": self.names[top], "Team": self.teams[top], "Year": self.years[top],
+                "Distance": np.round(dist, 3),
+                "Similarity": np.round(1 / (1 + dist), 3),
+                "Shared": np.array(shared, dtype=object)}
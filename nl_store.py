@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+"""
+nl_store.py
+-----------
+In-memory, NumPy array-backed copy of the leader and standings tables.
+
+Layout
+• leaders   one row per (source, Statistic, Year, leader) from the four leader
+            tables, integer-coded (stat / player / team → vocab index) and
+            sorted by (stat, Year, best value first).
+            ``year_offsets[stat, year - min_year]`` is where that season starts,
+            so any (stat, year range) is one contiguous slice.  Values are
+            float32; "best first" comes from the value plus the stat's
+            ``lower`` flag, so no separate sort key is kept.
+• standings one row per (Team, Year), sorted by (team, Year) with
+            ``team_offsets`` for O(1) team slices.
+
+Code 0 of the player / team vocabularies is reserved for a missing name,
+so a NULL Team reads back as None.  Code arrays use the smallest integer
+type their vocabulary fits.
+
+Every query is slicing + a vectorised sort / mask over those arrays, so no
+SQL or DataFrame work happens per call.  Results come back as plain
+{column: ndarray} dicts — wrap them in ``pd.DataFrame`` if needed.
+
+    store = StatsStore.from_db(nl_config.path("db_path"))
+    store.leaderboard("Home Runs", start=1950, end=1959, limit=5)
+"""
+
+import sqlite3
+import numpy as np
+
+from nl_parse import rate_value
+
+# short name → leader table
+SOURCES = {
+    "player_hitting":  "player_hitting_leaders",
+    "player_pitching": "player_pitching_leaders",
+    "team_hitting":    "team_hitting_leaders",
+    "team_pitching":   "team_pitching_leaders",
+}
+
+
+def lower_is_better(stat: str) -> bool:
+    """ERA and the 'Fewest …' pitching stats rank ascending."""
+    return stat == "ERA" or stat.startswith("Fewest")
+
+
+def to_number(value, statistic=None):
+    """
+    '1,544' / '.336' / 61.0 → float; anything else → NaN.  With *statistic*,
+    averages / percentages missing their dot are rescaled (nl_parse.rate_value).
+    """
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return rate_value(statistic, float(value))
+    try:
+        return rate_value(statistic, float(str(value).replace(",", "").strip()))
+    except ValueError:
+        return np.nan
+
+
+MISSING = 0             # vocab code of a missing (None) player / team
+
+
+class _Vocab:
+    """String ↔ int code mapping built while loading (code 0 = None if *missing*)."""
+
+    def __init__(self, missing=True):
+        self.codes = {None: MISSING} if missing else {}
+
+    def code(self, text):
+        return self.codes.setdefault(text, len(self.codes))
+
+    def dtype(self):
+        return np.int16 if len(self.codes) <= np.iinfo(np.int16).max else np.int32
+
+    def array(self):
+        return np.array(list(self.codes), dtype=object)
+
+
+class StatsStore:
+    """Compact, Year-sorted arrays with vectorised leaderboard queries."""
+
+    def __init__(self, leader_rows, standing_rows):
+        stats, players, teams = _Vocab(missing=False), _Vocab(), _Vocab()
+
+        # ── leaders ─────────────────────────────────────────────────────
+        src_names = list(SOURCES)
+        n = len(leader_rows)
+        stat   = np.empty(n, np.int16)
+        year   = np.empty(n, np.int16)
+        player = np.empty(n, np.int32)
+        team   = np.empty(n, np.int32)
+        value  = np.empty(n, np.float32)
+        for i, (src, y, s, name, t, v) in enumerate(leader_rows):
+            stat[i]   = stats.code((src, s))
+            year[i]   = y
+            player[i] = players.code(name)
+            team[i]   = teams.code(t)
+            value[i]  = v
+
+        self.stat_keys = list(stats.codes)             # code → (source, Statistic)
+        self.stat_codes = {k: i for i, k in enumerate(stats.codes)}
+        self.lower = np.array([lower_is_better(s) for _, s in stats.codes], dtype=bool)
+        self.stat_source = np.array([src_names.index(src) for src, _ in stats.codes],
+                                    dtype=np.int8)
+
+        order = np.lexsort((np.where(self.lower[stat], value, -value), year, stat))
+        self.stat, self.year, self.value = (a[order] for a in (stat, year, value))
+        self.player = player[order].astype(players.dtype())
+        self.team = team[order].astype(teams.dtype())
+
+        self.min_year = int(year.min()) if n else 0
+        self.max_year = int(year.max()) if n else -1
+        span = np.arange(self.min_year, self.max_year + 2)
+        self.year_offsets = np.empty((len(self.stat_keys), len(span)),
+                                     np.uint16 if n <= np.iinfo(np.uint16).max else np.int32)
+        stat_bounds = np.searchsorted(self.stat, np.arange(len(self.stat_keys) + 1))
+        for s in range(len(self.stat_keys)):
+            a, b = stat_bounds[s], stat_bounds[s + 1]
+            self.year_offsets[s] = a + np.searchsorted(self.year[a:b], span)
+
+        # ── standings ───────────────────────────────────────────────────
+        m = len(standing_rows)
+        s_team = np.empty(m, np.int32)
+        s_year = np.empty(m, np.int16)
+        wins   = np.empty(m, np.float32)
+        losses = np.empty(m, np.float32)
+        wp     = np.empty(m, np.float32)
+        gb     = np.empty(m, np.float32)
+        for i, (y, t, w, l, p, g) in enumerate(standing_rows):
+            s_team[i], s_year[i] = teams.code(t), y
+            wins[i], losses[i], wp[i], gb[i] = to_number(w), to_number(l), to_number(p), \
+                to_number(g)
+        order = np.lexsort((s_year, s_team))
+        self.s_year, self.wins, self.losses, self.wp, self.gb = (
+            a[order] for a in (s_year, wins, losses, wp, gb))
+        self.s_team = s_team[order].astype(teams.dtype())
+
+        self.players = players.array()
+        self.teams = teams.array()
+        self.team_offsets = np.searchsorted(self.s_team, np.arange(len(self.teams) + 1)) \
+            .astype(np.int32)
+        # (Year, Team) → standings row, for the leaderboard W-L join
+        key = self.s_year.astype(np.int32) * len(self.teams) + self.s_team
+        self._s_key_order = np.argsort(key, kind="stable").astype(np.int32)
+        self._s_key = key[self._s_key_order]
+
+    # ── construction ────────────────────────────────────────────────────
+    @classmethod
+    def from_db(cls, db_path):
+        """Load from the pipeline DB (rows without a numeric value are dropped)."""
+        conn = sqlite3.connect(db_path)
+        try:
+            leaders = []
+            for src, table in SOURCES.items():
+                name = "Name" if src.startswith("player") else "NULL"
+                for y, s, who, t, v in conn.execute(
+                        f'SELECT Year, Statistic, {name}, Team, "#" FROM {table}'):
+                    v = to_number(v, s)
+                    if y is not None and s and not np.isnan(v):
+                        leaders.append((src, int(y), s, who, t, v))
+            standings = [r for r in conn.execute(
+                "SELECT Year, Team, Wins, Losses, WP, GB FROM team_standings")
+                if r[0] is not None and r[1]]
+        finally:
+            conn.close()
+        return cls(leaders, standings)
+
+    # ── helpers ─────────────────────────────────────────────────────────
+    @property
+    def nbytes(self) -> int:
+        arrays = [v for v in vars(self).values() if isinstance(v, np.ndarray)]
+        vocab = sum(len(str(x)) + 50 for x in
+                    [*self.players[1:], *self.teams[1:], *self.stat_keys])
+        return sum(a.nbytes for a in arrays) + vocab
+
+    def statistics(self, source="player_hitting"):
+        return sorted(s for src, s in self.stat_keys if src == source)
+
+    def _stat(self, stat, source):
+        try:
+            return self.stat_codes[(source, stat)]
+        except KeyError:
+            raise KeyError(f"No statistic {stat!r} in {source}") from None
+
+    def _range(self, s, start, end):
+        lo = self.min_year if start is None else max(start, self.min_year)
+        hi = self.max_year if end is None else min(end, self.max_year)
+        if lo > hi:
+            return 0, 0
+        return (int(self.year_offsets[s, lo - self.min_year]),
+                int(self.year_offsets[s, hi - self.min_year + 1]))
+
+    def _rows(self, idx, with_player=True):
+        out = {"Year": self.year[idx]}
+        if with_player:
+            out["Name"] = self.players[self.player[idx]]
+        out["Team"] = self.teams[self.team[idx]]
+        out["Value"] = self.value[idx]
+        return out
+
+    # ── queries ─────────────────────────────────────────────────────────
+    def year_slice(self, stat, source="player_hitting", start=None, end=None):
+        """Every leader row for *stat* in [start, end], by Year then best first."""
+        s = self._stat(stat, source)
+        a, b = self._range(s, start, end)
+        return self._rows(np.arange(a, b), source.startswith("player"))
+
+    def top_n_per_season(self, stat, source="player_hitting", n=3, start=None, end=None):
+        """The best *n* rows of every season in [start, end]."""
+        s = self._stat(stat, source)
+        a, b = self._range(s, start, end)
+        idx = np.arange(a, b)
+        rank = idx - self.year_offsets[s, self.year[idx] - self.min_year]
+        return self._rows(idx[rank < n], source.startswith("player"))
+
+    def leaderboard(self, stat, source="player_hitting", start=None, end=None,
+                    limit=10, with_record=False):
+        """Best *limit* single-season values of *stat* over [start, end]."""
+        s = self._stat(stat, source)
+        a, b = self._range(s, start, end)
+        seg = self.value[a:b] if self.lower[s] else -self.value[a:b]   # smaller = better
+        k = min(limit, len(seg))
+        if k == 0:
+            return self._rows(np.empty(0, np.int64), source.startswith("player"))
+        top = np.argpartition(seg, k - 1)[:k] if k < len(seg) else np.arange(len(seg))
+        idx = a + top[np.lexsort((self.year[a + top], seg[top]))]
+        out = self._rows(idx, source.startswith("player"))
+        if with_record:
+            out.update(self.standing_for(self.year[idx], self.team[idx]))
+        return out
+
+    def standing_for(self, years, team_codes):
+        """Wins / Losses for (Year, team) pairs; NaN where no standings row matches."""
+        key = years.astype(np.int64) * len(self.teams) + team_codes
+        pos = np.searchsorted(self._s_key, key)
+        pos = np.minimum(pos, max(len(self._s_key) - 1, 0))
+        hit = (self._s_key[pos] == key) if len(self._s_key) else np.zeros(len(key), bool)
+        rows = self._s_key_order[pos]
+        return {"Wins":   np.where(hit, self.wins[rows], np.nan),
+                "Losses": np.where(hit, self.losses[rows], np.nan)}
+
+    def team_history(self, team, start=None, end=None, exact=False):
+        """
+        Standings rows for one club across seasons.  By default *team* is a
+        case-insensitive substring, like the SQL engine's LIKE '%team%'.
+        """
+        if exact:
+            codes = np.flatnonzero(self.teams == team)
+        else:
+            names = self.teams[MISSING + 1:].astype(str)
+            codes = MISSING + 1 + np.flatnonzero(
+                np.char.find(np.char.lower(names), team.lower()) >= 0)
+        idx = np.concatenate([np.arange(self.team_offsets[c], self.team_offsets[c + 1])
+                              for c in codes]) if len(codes) else np.empty(0, np.int64)
+        idx = idx.astype(np.int64)
+        if start is not None:
+            idx = idx[self.s_year[idx] >= start]
+        if end is not None:
+            idx = idx[self.s_year[idx] <= end]
+        idx = idx[np.argsort(self.s_year[idx], kind="stable")]
+        return {"Year": self.s_year[idx], "Team": self.teams[self.s_team[idx]],
+                "Wins": self.wins[idx], "Losses": self.losses[idx],
+                "WP": self.wp[idx], "GB": self.gb[idx]}
+
+    def player_rows(self, name, sources=("player_hitting",), with_record=False):
+        """Every season line led by one player (exact name), by Year."""
+        codes = np.flatnonzero(self.players == name)
+        wanted = np.array([list(SOURCES).index(s) for s in sources])
+        if len(codes):
+            idx = np.flatnonzero((self.player == codes[0]) &
+                                 np.isin(self.stat_source[self.stat], wanted))
+            idx = idx[np.argsort(self.year[idx], kind="stable")]
+        else:
+            idx = np.empty(0, np.int64)
+        out = {"Year": self.year[idx], "Team": self.teams[self.team[idx]],
+               "Statistic": np.array([self.stat_keys[s][1] for s in self.stat[idx]],
+                                     dtype=object),
+               "Value": self.value[idx]}
+        if with_record:
+            out.update(self.standing_for(self.year[idx], self.team[idx]))
+        return out
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+"""
+run_pipeline.py
+---------------
+Single entry point for the National-League pipeline.
+
+    scrape ─┬─ parse ─── clean_* (3, per table) ─── load ─── export_* (5, per view)
+            └─ parse_tidy
+
+With --stream, `load` reads the raw tables directly (create_nl_db.py --stream)
+and no longer depends on parse / clean_*.
+
+Each stage declares its script, inputs and outputs.  A stage is skipped when
+its inputs (content hash) and its script are unchanged since the last
+successful run and its outputs still exist; everything that is out of date
+runs as soon as its dependencies finish, independent stages side by side.
+
+Usage
+  python run_pipeline.py                 # bring everything up to date
+  python run_pipeline.py load            # only `load` (+ stale deps)
+  python run_pipeline.py --force export_nl_team_standings
+  python run_pipeline.py --dry-run       # show what is stale right now
+  python run_pipeline.py --jobs 4 --profile
+  python run_pipeline.py --stream load   # raw → SQLite, no intermediate CSVs
+
+Paths come from nl_pipeline.json (see nl_config.py); hashes are cached by
+(size, mtime) in the state file, so a no-op rerun only stats the inputs.
+"""
+
+import argparse, hashlib, json, logging, os, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from glob import has_magic
+from pathlib import Path
+
+import nl_config, nl_metrics
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s  %(levelname)s  %(message)s")
+
+ROOT_DIR = nl_config.ROOT_DIR
+LOG_DIR  = nl_metrics.METRICS_DIR / "logs"
+
+CLEAN_TABLES = {   # cleaning_eda.py --table key → logical table
+    "player_hitting":  "player_hitting_leaders",    # rate values only (nl_parse.rate_value)
+    "player_pitching": "player_pitching_leaders",
+    "team_hitting":    "team_hitting_leaders",
+    "team_pitching":   "team_pitching_leaders",
+}
+EXPORT_VIEWS = {   # export_nl_clean_csvs.py --view → output file
+    "nl_player_hitting":  "1_National_League_Player_Review_Hitting_Statistics_League_Leaders.csv",
+    "nl_player_pitching": "2_National_League_Pitcher_Review_Pitching_Statistics_League_Leaders.csv",
+    "nl_team_standings":  "3_National_League_Team_Standings.csv",
+    "nl_team_hitting":    "4_National_League_Team_Review_Hitting_Statistics_League_Leaderboard.csv",
+    "nl_team_pitching":   "5_National_League_Team_Review_Pitching_Statistics_Leaderboard.csv",
+}
+# shared modules each script runs through, imported directly or not (a change
+# re-runs its stages); nl_metrics only records timings and is left out
+SCRIPT_MODULES = {
+    "3.National_League_Cleaned/clean_all_nl_v2.py":   ["nl_config.py", "nl_parse.py"],
+    "3.1.Parsing/parse_all_tables.py":                ["nl_config.py"],
+    "4.Further_clean_and_EDA/cleaning_eda.py":        ["nl_config.py", "nl_parse.py"],
+    "create_nl_db.py":                                ["nl_config.py", "nl_parse.py", "nl_db.py",
+                                                       "nl_store.py", "nl_era.py", "nl_careers.py",
+                                                       "nl_records.py", "nl_similar.py"],
+    "3.National_League_Cleaned/export_nl_clean_csvs.py": ["nl_config.py", "nl_db.py"],
+}
+
+
+def _modules(script: str) -> list:
+    return [str(ROOT_DIR / m) for m in SCRIPT_MODULES.get(script, [])]
+
+
+def build_stages(paths: dict, stream: bool = False) -> dict:
+    """The DAG: stage name → script, args, inputs, outputs, deps."""
+    raw_glob = str(paths["raw_dir"] / "*_Table_*.csv")
+    v2_csvs  = [str(paths["clean_dir"] / f) for f in nl_config.TABLES.values()]
+
+    stages = {
+        "scrape": {
+            "script":  "1.Web_Scraping/selenium_scraper.py",
+            "inputs":  [],                       # the web: rerun with --force
+            "outputs": [str(paths["raw_dir"])],
+            "deps":    [],
+        },
+        "parse": {
+            "script":  "3.National_League_Cleaned/clean_all_nl_v2.py",
+            "inputs":  [raw_glob],
+            "outputs": v2_csvs,
+            "deps":    ["scrape"],
+        },
+        "parse_tidy": {
+            "script":  "3.1.Parsing/parse_all_tables.py",
+            "inputs":  [raw_glob],
+            "outputs": [str(paths["clean_dir"] / f"{t}.csv") for t in nl_config.TABLES],
+            "deps":    ["scrape"],
+        },
+    }
+    for key, table in CLEAN_TABLES.items():      # cleaned in place, one per table
+        csv = str(paths["clean_dir"] / nl_config.TABLES[table])
+        stages[f"clean_{key}"] = {
+            "script":  "4.Further_clean_and_EDA/cleaning_eda.py",
+            "args":    ["--table", key],
+            "inputs":  [csv],
+            "outputs": [csv],
+            "deps":    ["parse"],
+        }
+    stages["load"] = {
+        "script":  "create_nl_db.py",
+        "inputs":  v2_csvs,
+        "outputs": [str(paths["db_path"])],
+        "deps":    ["parse"] + [f"clean_{k}" for k in CLEAN_TABLES],
+    }
+    if stream:
+        stages["load"].update(args=["--stream"], inputs=[raw_glob],
+                              deps=["scrape"])
+    for view, csv_name in EXPORT_VIEWS.items():
+        stages[f"export_{view}"] = {
+            "script":  "3.National_League_Cleaned/export_nl_clean_csvs.py",
+            "args":    ["--view", view],
+            "inputs":  [str(paths["db_path"])],
+            "outputs": [str(paths["export_dir"] / csv_name)],
+            "deps":    ["load"],
+        }
+    for stage in stages.values():
+        stage["inputs"] = stage["inputs"] + _modules(stage["script"])
+    return stages
+
+
+# ── hashing ──────────────────────────────────────────────────────────
+def _expand(spec: str):
+    """A path, or a glob such as raw_dir/*_Table_*.csv, → sorted files."""
+    if has_magic(spec):
+        p = Path(spec)
+        return sorted(p.parent.glob(p.name))
+    return [Path(spec)]
+
+
+def _file_digest(path: Path, cache: dict):
+    """sha256 of a file, reused while its size and mtime are unchanged."""
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    key = str(path)
+    hit = cache.get(key)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    cache[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return cache[key][2]
+
+
+def stage_digest(stage: dict, cache: dict) -> str:
+    """Hash of the stage definition, its script and every input file."""
+    h = hashlib.sha256()
+    h.update(json.dumps([stage["script"], stage.get("args", [])]).encode())
+    h.update(_file_digest(ROOT_DIR / stage["script"], cache).encode())
+    for spec in stage["inputs"]:
+        for p in _expand(spec):
+            h.update(f"{p}\0{_file_digest(p, cache)}\n".encode())
+    return h.hexdigest()
+
+
+def is_fresh(name: str, stage: dict, state: dict, cache: dict) -> bool:
+    if not all(Path(o).exists() for o in stage["outputs"]):
+        return False
+    if not stage["inputs"]:                      # nothing to compare against
+        return True
+    return state["stages"].get(name) == stage_digest(stage, cache)
+
+
+# ── state ────────────────────────────────────────────────────────────
+def load_state(path: Path) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("files", {})
+    state.setdefault("stages", {})
+    return state
+
+
+def save_state(path: Path, state: dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ── execution ────────────────────────────────────────────────────────
+def run_stage(name: str, stage: dict, env: dict):
+    """Run one stage script in its own directory; output goes to a log file."""
+    script = ROOT_DIR / stage["script"]
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = LOG_DIR / f"{nl_metrics.RUN_ID}_{name}.log"
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        proc = subprocess.run([sys.executable, str(script), *stage.get("args", [])],
+                              cwd=script.parent, env=env,
+                              stdout=log_file, stderr=subprocess.STDOUT)
+    return proc.returncode, time.perf_counter() - t0, log_path
+
+
+def _with_deps(stages: dict, targets: list) -> list:
+    """targets plus everything upstream of them, in declaration order."""
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(stages[name]["deps"])
+    return [n for n in stages if n in wanted]
+
+
+def run(stages: dict, targets: list, state: dict, force=(), jobs=None,
+        dry_run=False, env=None):
+    """
+    Schedule the DAG; returns {stage: "ran" | "skipped" | "failed" | "blocked"}
+    ("stale" instead of "ran" on a dry run).
+    """
+    order   = _with_deps(stages, targets)
+    cache   = state["files"]
+    status  = {}
+    running = {}
+
+    def ready(name):
+        return name not in status and name not in running.values() and \
+            all(status.get(d) in ("ran", "skipped", "stale") for d in stages[name]["deps"])
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(order):
+            for name in order:
+                if name in status or name in running.values():
+                    continue
+                if any(status.get(d) in ("failed", "blocked") for d in stages[name]["deps"]):
+                    status[name] = "blocked"
+                    logging.warning("⏭  %s blocked by a failed dependency", name)
+                    continue
+                if not ready(name):
+                    continue
+                upstream_stale = any(status.get(d) == "stale" for d in stages[name]["deps"])
+                if name not in force and "*" not in force and not upstream_stale and \
+                        is_fresh(name, stages[name], state, cache):
+                    status[name] = "skipped"
+                    logging.info("✓ %s up to date", name)
+                elif dry_run:
+                    status[name] = "stale"
+                    logging.info("… %s would run", name)
+                else:
+                    logging.info("▶ %s", name)
+                    running[pool.submit(run_stage, name, stages[name], env)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                code, secs, log_path = fut.result()
+                if code == 0:
+                    status[name] = "ran"
+                    logging.info("✓ %s finished in %.1fs", name, secs)
+                else:
+                    status[name] = "failed"
+                    state["stages"].pop(name, None)
+                    tail = log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-10:]
+                    logging.error("🚨 %s failed (exit %s) — see %s\n%s",
+                                  name, code, log_path, "\n".join(tail))
+
+    # Record digests once the whole run has settled: stages that rewrite their
+    # own inputs (clean_*) or touch a shared input (export views) stay fresh.
+    if not dry_run:
+        for name in order:
+            if status[name] in ("ran", "skipped") and stages[name]["inputs"]:
+                state["stages"][name] = stage_digest(stages[name], cache)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the National-League pipeline")
+    parser.add_argument("targets", nargs="*",
+                        help="Stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="Rerun these stages even if fresh (no names = all)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Stages run in parallel (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which stages are out of date")
+    parser.add_argument("--list", action="store_true", help="List stages and exit")
+    parser.add_argument("--config", help="Path config (default nl_pipeline.json)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Load straight from the raw tables (create_nl_db.py --stream)")
+    nl_metrics.add_arguments(parser)
+    args = nl_metrics.configure(parser.parse_args())
+
+    paths  = nl_config.load(args.config) if args.config else nl_config.PATHS
+    stages = build_stages(paths, stream=args.stream)
+    if args.list:
+        for name, st in stages.items():
+            print(f"{name:32s} ← {', '.join(st['deps']) or '-'}")
+        return
+
+    unknown = [t for t in args.targets + (args.force or []) if t not in stages]
+    if unknown:
+        sys.exit(f"❌ Unknown stage(s): {', '.join(unknown)}. Use --list.")
+    force = set(args.force) if args.force else ({"*"} if args.force == [] else set())
+    targets = args.targets or list(stages)
+
+    env = dict(os.environ, NL_RUN_ID=nl_metrics.RUN_ID)
+    if args.config:
+        env["NL_CONFIG"] = str(Path(args.config).resolve())
+    if nl_metrics.PROFILE:
+        env["NL_PROFILE"] = "1"
+    if nl_metrics.METRICS_FILE:
+        env["NL_METRICS_FILE"] = str(nl_metrics.METRICS_FILE)
+
+    state_path = paths["state_file"]
+    state = load_state(state_path)
+    with nl_metrics.stage("pipeline") as m:
+        status = run(stages, targets, state, force=force, jobs=args.jobs,
+                     dry_run=args.dry_run, env=env)
+        m.extra = {s: sum(1 for v in status.values() if v == s)
+                   for s in ("ran", "skipped", "stale", "failed", "blocked")}
+    if not args.dry_run:
+        save_state(state_path, state)
+
+    logging.info("🏁 %s", ", ".join(f"{k}={v}" for k, v in m.extra.items()))
+    if m.extra["failed"] or m.extra["blocked"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()